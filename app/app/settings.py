@@ -46,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover the whole request, see below
+    'core.middleware.InstrumentationMiddleware',
+    # Before anything that reads or changes the response body
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +58,52 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# Record SQL and timings of every request in Server-Timing headers and the
+# core.instrumentation log, and warn about statements run at least
+# REQUEST_INSTRUMENTATION_DUPLICATES times in one request
+REQUEST_INSTRUMENTATION = bool(
+    int(os.environ.get('REQUEST_INSTRUMENTATION', 0))
+)
+REQUEST_INSTRUMENTATION_DUPLICATES = int(
+    os.environ.get('REQUEST_INSTRUMENTATION_DUPLICATES', 3)
+)
+
+# Send the request instrumentation lines and the readiness failures to
+# stderr, where the process manager collects them
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.health': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Negotiated response compression, see core/compression.py. Encodings are
+# listed in order of preference, br needs the brotli package. Responses
+# below COMPRESSION_MIN_SIZE bytes are sent as is.
+COMPRESSION_ENABLED = bool(int(os.environ.get('COMPRESSION_ENABLED', 1)))
+COMPRESSION_ENCODINGS = os.environ.get(
+    'COMPRESSION_ENCODINGS', 'br,gzip,deflate'
+).split(',')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 512))
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)
+)
 
 ROOT_URLCONF = 'app.urls'
 
@@ -79,16 +129,132 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# DB_POOL=1 takes connections from an in-process pool, DB_CONN_MAX_AGE
+# then defaults to 0 so every request gives its connection back.
+# DB_PGBOUNCER=1 disables server-side cursors, which do not survive
+# pgbouncer's transaction pooling.
+DB_POOL = bool(int(os.environ.get('DB_POOL', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql_pool' if DB_POOL
+        else 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds a connection is kept between requests, 0 closes it after
+        # every request, or returns it to the pool
+        'CONN_MAX_AGE': int(
+            os.environ.get('DB_CONN_MAX_AGE', 0 if DB_POOL else 60)
+        ),
+        'DISABLE_SERVER_SIDE_CURSORS': bool(
+            int(os.environ.get('DB_PGBOUNCER', 0))
+        ),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            # Seconds to wait for a free connection
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+            # Seconds idle after which a connection is checked before use
+            'HEALTH_CHECK_IDLE': float(
+                os.environ.get('DB_POOL_HEALTH_CHECK_IDLE', 30)
+            ),
+        },
     }
 }
 
+# Check persistent connections are still alive at the start of every
+# request and reconnect if they are not
+DB_HEALTH_CHECKS = bool(int(os.environ.get('DB_HEALTH_CHECKS', 1)))
+
+# Database aliases the /readyz endpoint probes, all of them when empty
+HEALTHCHECK_DATABASES = [
+    alias for alias in os.environ.get('HEALTHCHECK_DATABASES', '').split(',')
+    if alias
+]
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+#
+# The 'api' cache holds per-user list responses. API_CACHE_BACKEND is
+# 'locmem', 'file' or the dotted path of any Django cache backend.
+# Invalidation goes through this cache, so 'locmem' is only safe with a
+# single process; run several workers on a shared ('file' or networked)
+# backend.
+
+API_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+API_CACHE_BACKEND = os.environ.get('API_CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': API_CACHE_BACKENDS.get(API_CACHE_BACKEND, API_CACHE_BACKEND),
+        'LOCATION': os.environ.get('API_CACHE_LOCATION', 'recipe-api'),
+        'TIMEOUT': int(os.environ.get('API_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('API_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+# Cache alias used for API responses, set API_CACHE_ENABLED=0 to disable
+API_CACHE_ALIAS = 'api' if int(os.environ.get('API_CACHE_ENABLED', 1)) else None
+
+
+# Recipe API
+
+# Largest JSON array accepted by the bulk ingredient create endpoint
+INGREDIENT_BULK_MAX_BATCH = int(os.environ.get('INGREDIENT_BULK_MAX_BATCH', 1000))
+
+# Recipes written per batch by the NDJSON import
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+# Recipes read per server-side cursor fetch by the streaming export
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Most operations accepted by one /api/batch/ request, see core/batch.py
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 50))
+
+# Build list responses from values() rows instead of the serializers,
+# see recipe/rows.py
+FAST_LIST_SERIALIZATION = bool(
+    int(os.environ.get('FAST_LIST_SERIALIZATION', 1))
+)
+
+# Run the database work of the async read endpoints on Django's single
+# thread sensitive executor (1) or on the default executor with a
+# connection per thread (0), see recipe/async_views.py
+ASYNC_READ_THREAD_SENSITIVE = bool(
+    int(os.environ.get('ASYNC_READ_THREAD_SENSITIVE', 1))
+)
+
+
+# Token authentication cache, per process. Entries are dropped on token
+# deletion and user changes in the same process and expire after the TTL
+# (seconds) everywhere else.
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get('TOKEN_CACHE_MAX_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+
+# Signed access tokens, sent as "Authorization: Bearer <token>". They are
+# verified without a query and expire after ACCESS_TOKEN_LIFETIME seconds,
+# refresh tokens are stored in the database. Revocations are kept in the
+# TOKEN_REVOCATION_CACHE, which must be shared by every process: startup
+# fails when it is a local memory cache.
+SIGNED_TOKENS_ENABLED = bool(int(os.environ.get('SIGNED_TOKENS_ENABLED', 0)))
+ACCESS_TOKEN_LIFETIME = int(os.environ.get('ACCESS_TOKEN_LIFETIME', 300))
+REFRESH_TOKEN_LIFETIME = int(
+    os.environ.get('REFRESH_TOKEN_LIFETIME', 14 * 24 * 3600)
+)
+TOKEN_REVOCATION_CACHE = os.environ.get('TOKEN_REVOCATION_CACHE', 'default')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -108,6 +274,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# PBKDF2 iterations of new password hashes, existing hashes are upgraded
+# or downgraded the next time their user logs in
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 216000)
+)
+
+PASSWORD_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Threads hashing passwords for the async token and create user views and
+# the most hashes allowed to wait for one before new ones are refused
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+)
+PASSWORD_HASH_MAX_PENDING = int(
+    os.environ.get('PASSWORD_HASH_MAX_PENDING', 64)
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
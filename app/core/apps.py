@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """ Connect the persistent connection health checks if enabled """
+        from django.conf import settings
+        from django.core.signals import request_started
+
+        from core.health import check_persistent_connections
+
+        if getattr(settings, 'DB_HEALTH_CHECKS', False):
+            request_started.connect(
+                check_persistent_connections,
+                dispatch_uid='core.check_persistent_connections'
+            )
@@ -0,0 +1,167 @@
+"""
+    Batch endpoint running several API requests in one round trip.
+
+    POST /api/batch/ with
+        {"operations": [{"method": "POST", "path": "/api/recipe/ingredients/",
+                         "body": {"name": "Salt"}}, ...],
+         "atomic": false}
+    runs the operations in order through the URL resolver and the regular
+    API views and answers {"results": [{"status": 201, "body": ...}, ...]}.
+    The batch is authenticated once and every operation runs as that user.
+    With "atomic" the operations share one transaction, which is rolled
+    back at the first operation answering 400 or more; the results then
+    stop there and "committed" is false.
+"""
+import io
+import json
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http.request import split_domain_port
+from django.urls import Resolver404, resolve
+from django.utils.http import urlencode
+
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from user.authentication import API_AUTHENTICATION_CLASSES
+
+from recipe.cache import invalidate_rolled_back
+
+
+# Headers of the batch request that must not leak into its operations
+BATCH_ONLY_META = (
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'QUERY_STRING', 'HTTP_IF_MATCH',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_ACCEPT_ENCODING',
+)
+
+
+class OperationSerializer(serializers.Serializer):
+    """ One request of a batch """
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+    )
+    path = serializers.RegexField(r'^/api/')
+    params = serializers.DictField(required=False)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """ The ordered operations of a batch """
+    operations = OperationSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_operations(self, operations):
+        if len(operations) > settings.BATCH_MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                'At most {} operations can be sent at once.'.format(
+                    settings.BATCH_MAX_OPERATIONS)
+            )
+        return operations
+
+
+class BatchView(APIView):
+    """ Run a batch of API requests, see the module docstring """
+    authentication_classes = API_AUTHENTICATION_CLASSES
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+        if not serializer.validated_data['atomic']:
+            return Response({
+                'results': [self.run(request, op) for op in operations],
+                'committed': True,
+            })
+
+        results = []
+        try:
+            with transaction.atomic():
+                for operation in operations:
+                    results.append(self.run(request, operation))
+                    if results[-1]['status'] >= 400:
+                        transaction.set_rollback(True)
+                        break
+        except Exception:
+            # Reads may have cached what an exception just rolled back
+            invalidate_rolled_back(request.user.pk)
+            raise
+        if results[-1]['status'] >= 400:
+            invalidate_rolled_back(request.user.pk)
+            return Response({'results': results, 'committed': False})
+        return Response({'results': results, 'committed': True})
+
+    def run(self, request, operation):
+        """ Dispatch one operation and return its status and body """
+        path, _, query = operation['path'].partition('?')
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return self.error(status.HTTP_404_NOT_FOUND, 'Not found.')
+        view_class = getattr(match.func, 'cls', None)
+        if view_class is None or not issubclass(view_class, APIView) or \
+                issubclass(view_class, BatchView):
+            return self.error(
+                status.HTTP_400_BAD_REQUEST, 'Cannot be run in a batch.'
+            )
+
+        response = match.func(
+            self.build_request(request, operation, path, query),
+            *match.args, **match.kwargs
+        )
+        if isinstance(response, Response):
+            body = response.data
+        elif response.streaming:
+            body = b''.join(response.streaming_content).decode()
+        else:
+            body = response.content.decode()
+        return {'status': response.status_code, 'body': body}
+
+    def build_request(self, request, operation, path, query):
+        """
+            Return the WSGI request of an operation, authenticated as the
+            user of the batch
+        """
+        if operation.get('params'):
+            query = '&'.join(filter(None, (
+                query, urlencode(operation['params'], doseq=True)
+            )))
+        body = b''
+        if 'body' in operation:
+            body = json.dumps(operation['body']).encode()
+
+        environ = {
+            key: value for key, value in request.META.items()
+            if key not in BATCH_ONLY_META
+        }
+        # ASGI requests have no wsgi.url_scheme, links would start none://
+        host, port = split_domain_port(request.get_host())
+        environ.update({
+            'wsgi.url_scheme': request.scheme,
+            'SERVER_NAME': host,
+            'SERVER_PORT': port or str(request.get_port()),
+            'REQUEST_METHOD': operation['method'],
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': io.BytesIO(body),
+        })
+        sub_request = WSGIRequest(environ)
+        # Read by rest_framework.request.Request instead of authenticating
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+    def error(self, status_code, detail):
+        return {'status': status_code, 'body': {'detail': detail}}
+
+
+batch = BatchView.as_view()
@@ -0,0 +1,90 @@
+"""
+    Helpers shared by the benchmark management commands.
+"""
+import math
+import time
+
+
+def percentile(values, pct):
+    """ Return the pct percentile of values, nearest rank """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """ Summarize request latencies (seconds) measured over elapsed """
+    count = len(latencies)
+    return {
+        'requests': count,
+        'seconds': round(elapsed, 4),
+        'requests_per_sec': round(count / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else None,
+        'p50_ms': _ms(percentile(latencies, 50)),
+        'p90_ms': _ms(percentile(latencies, 90)),
+        'p99_ms': _ms(percentile(latencies, 99)),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class QueryCounter:
+    """
+        Database execute wrapper counting the queries run on a connection
+        and the time spent in them
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - start
+
+
+def compare(baseline, current, tolerance=0.1):
+    """
+        Compare two benchmark results by scenario. A scenario regressed if
+        its throughput fell or its p99 latency grew by more than tolerance,
+        or if it runs more queries per request.
+    """
+    previous = {r['scenario']: r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = previous.get(result['scenario'])
+        if before is None:
+            continue
+        rps = _change(before['requests_per_sec'], result['requests_per_sec'])
+        p99 = _change(before['p99_ms'], result['p99_ms'])
+        rows.append({
+            'scenario': result['scenario'],
+            'requests_per_sec_change': rps,
+            'p99_ms_change': p99,
+            'queries_per_request': [
+                before['queries_per_request'],
+                result['queries_per_request'],
+            ],
+            'regressed': (
+                (rps is not None and rps < -tolerance) or
+                (p99 is not None and p99 > tolerance) or
+                result['queries_per_request'] >
+                before['queries_per_request']
+            ),
+        })
+    return rows
+
+
+def _change(before, after):
+    """ Return the relative change from before to after """
+    if not before or after is None:
+        return None
+    return round((after - before) / before, 4)
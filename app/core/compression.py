@@ -0,0 +1,296 @@
+"""
+    Negotiated response compression.
+
+    CompressionMiddleware compresses text-like responses with the best
+    encoding the client accepts among COMPRESSION_ENCODINGS, in that order
+    of preference on ties: br (when the brotli package is installed), gzip
+    and deflate. Responses smaller than COMPRESSION_MIN_SIZE, already
+    encoded, marked no-transform or of a binary content type are left
+    alone. Streaming responses are compressed chunk by chunk and flushed
+    after each one, so clients keep receiving data as it is produced.
+
+    The thread CPU time spent compressing and the bytes in and out are
+    added up per encoding in stats, which /readyz?verbose reports, and
+    each compressed response carries them in its Server-Timing header.
+
+    The middleware is sync and async capable, so under ASGI it does not
+    push the async views onto the thread running sync code. Django 3.1
+    streaming responses iterate synchronously in either case.
+"""
+import asyncio
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Prefixes of the content types worth compressing
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/x-ndjson',
+    'application/javascript', 'application/xml', 'application/msgpack',
+    'image/svg+xml',
+)
+
+
+class ZlibCompressor:
+    """ Incremental gzip (wbits 31) or zlib deflate (wbits 15) stream """
+
+    def __init__(self, level, wbits):
+        self.stream = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self.stream.compress(data)
+
+    def flush(self):
+        return self.stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.stream.flush()
+
+
+class BrotliCompressor:
+    """ Incremental brotli stream """
+
+    def __init__(self, quality):
+        self.stream = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.stream.process(data)
+
+    def flush(self):
+        return self.stream.flush()
+
+    def finish(self):
+        return self.stream.finish()
+
+
+def get_compressor(encoding):
+    """ Return a new compressor for encoding at the configured level """
+    if encoding == 'br':
+        return BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    wbits = 31 if encoding == 'gzip' else 15
+    return ZlibCompressor(settings.COMPRESSION_LEVEL, wbits)
+
+
+def available_encodings():
+    """ Return the configured encodings this process can produce """
+    return [
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding in ('gzip', 'deflate') or
+        (encoding == 'br' and brotli is not None)
+    ]
+
+
+def parse_accept_encoding(header):
+    """ Return {coding: q} of an Accept-Encoding header """
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header, encodings):
+    """
+        Return the encoding with the highest q value in the header, the
+        first of encodings on a tie, or None if none is acceptable
+    """
+    codings = parse_accept_encoding(header)
+    chosen, chosen_q = None, 0.0
+    for encoding in encodings:
+        q = codings.get(encoding, codings.get('*', 0.0))
+        if q > chosen_q:
+            chosen, chosen_q = encoding, q
+    return chosen
+
+
+class CompressionStats:
+    """ Per process totals of the compressed responses per encoding """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def record(self, encoding, bytes_in, bytes_out, seconds):
+        with self._lock:
+            totals = self._totals.setdefault(encoding, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0
+            })
+            totals['responses'] += 1
+            totals['bytes_in'] += bytes_in
+            totals['bytes_out'] += bytes_out
+            totals['seconds'] += seconds
+
+    def skip(self, reason):
+        with self._lock:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._totals = {}
+            self._skipped = {}
+
+    def snapshot(self):
+        """ Return the totals with their ratio and CPU cost per MB """
+        with self._lock:
+            encodings = {}
+            for encoding, totals in self._totals.items():
+                encodings[encoding] = dict(
+                    totals,
+                    seconds=round(totals['seconds'], 6),
+                    ratio=_ratio(totals['bytes_in'], totals['bytes_out']),
+                    cpu_ms_per_mb=round(
+                        totals['seconds'] * 1000 /
+                        (totals['bytes_in'] / 1e6), 3
+                    ) if totals['bytes_in'] else None,
+                )
+            return {'encodings': encodings, 'skipped': dict(self._skipped)}
+
+
+stats = CompressionStats()
+
+
+def compression_stats():
+    """ Return the compression statistics of this process """
+    return stats.snapshot()
+
+
+def _ratio(bytes_in, bytes_out):
+    return round(bytes_in / bytes_out, 3) if bytes_out else None
+
+
+class CompressionMiddleware:
+    """ Compress responses, see the module docstring """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # What marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        """ Return the response compressed for the request if worthwhile """
+        reason = self.skip_reason(response)
+        if reason is not None:
+            stats.skip(reason)
+            return response
+
+        # The body now depends on Accept-Encoding whatever is chosen
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            available_encodings()
+        )
+        if encoding is None:
+            stats.skip('not_accepted')
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        elif not self.compress_content(response, encoding):
+            return response
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The compressed body is another representation of the same data
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def skip_reason(self, response):
+        """ Return why the response is left as is, or None """
+        if response.status_code in (204, 304):
+            return 'no_body'
+        if response.has_header('Content-Encoding'):
+            return 'encoded'
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return 'no_transform'
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES) and \
+                '+json' not in content_type:
+            return 'content_type'
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return 'too_small'
+        return None
+
+    def compress_content(self, response, encoding):
+        """ Compress a complete body, return False if it did not shrink """
+        content = response.content
+        start = time.thread_time()
+        compressor = get_compressor(encoding)
+        compressed = compressor.compress(content) + compressor.finish()
+        seconds = time.thread_time() - start
+        if len(compressed) >= len(content):
+            stats.skip('incompressible')
+            return False
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        stats.record(encoding, len(content), len(compressed), seconds)
+        self.add_server_timing(response, encoding, seconds, len(content),
+                               len(compressed))
+        return True
+
+    def compress_stream(self, content, encoding):
+        """ Yield the compressed chunks of a streaming body """
+        compressor = get_compressor(encoding)
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        try:
+            for chunk in content:
+                start = time.thread_time()
+                data = compressor.compress(chunk) + compressor.flush()
+                seconds += time.thread_time() - start
+                bytes_in += len(chunk)
+                bytes_out += len(data)
+                if data:
+                    yield data
+            start = time.thread_time()
+            data = compressor.finish()
+            seconds += time.thread_time() - start
+            bytes_out += len(data)
+            yield data
+        finally:
+            stats.record(encoding, bytes_in, bytes_out, seconds)
+
+    def add_server_timing(self, response, encoding, seconds, bytes_in,
+                          bytes_out):
+        metric = 'compress;dur={:.3f};desc="{} {}x"'.format(
+            seconds * 1000, encoding, _ratio(bytes_in, bytes_out)
+        )
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = \
+            '{}, {}'.format(existing, metric) if existing else metric
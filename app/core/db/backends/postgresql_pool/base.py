@@ -0,0 +1,71 @@
+"""
+    PostgreSQL backend that takes its connections from an in-process pool.
+
+    Closing the Django connection, at the end of every request when
+    CONN_MAX_AGE is 0, gives the psycopg2 connection back to the pool
+    instead of closing it. The pool is configured by the POOL entry of the
+    database settings: MAX_SIZE, TIMEOUT and HEALTH_CHECK_IDLE.
+"""
+from psycopg2 import extensions, extras
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool, pools, pools_lock
+
+
+def _is_usable(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def _reset(connection):
+    """ Roll back what the connection left open, False if it is broken """
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self, conn_params):
+        """ Return the pool of this alias, creating it on first use """
+        with pools_lock:
+            pool = pools.get(self.alias)
+            if pool is None:
+                options = self.settings_dict.get('POOL', {})
+                pool = pools[self.alias] = ConnectionPool(
+                    connect=lambda: base.Database.connect(**conn_params),
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5),
+                    health_check_idle=options.get('HEALTH_CHECK_IDLE', 30),
+                    is_usable=_is_usable,
+                    reset=_reset,
+                )
+            return pool
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).checkout()
+        # The per connection setup of the stock backend
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                pools[self.alias].checkin(self.connection)
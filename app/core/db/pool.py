@@ -0,0 +1,158 @@
+"""
+    Small thread-safe connection pool used by the pooled PostgreSQL
+    backend. It knows nothing about databases: connections are made by a
+    connect() callable, checked with is_usable() before being reused after
+    health_check_idle seconds idle, and tidied by reset() on check in.
+"""
+import threading
+import time
+from collections import deque
+
+
+# Pools of this process by database alias, filled by the pooled backend
+pools = {}
+pools_lock = threading.Lock()
+
+
+def pool_stats():
+    """ Return the statistics of every pool of this process """
+    return {alias: pool.stats() for alias, pool in list(pools.items())}
+
+
+class PoolTimeout(Exception):
+    """ Raised when no connection became free within the pool timeout """
+
+
+class ConnectionPool:
+    """ Bounded pool of connections with checkout statistics """
+
+    def __init__(self, connect, max_size=10, timeout=5,
+                 is_usable=None, reset=None, health_check_idle=30):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.is_usable = is_usable
+        self.reset = reset
+        self.health_check_idle = health_check_idle
+        # (connection, time it was checked in)
+        self._idle = deque()
+        self._size = 0
+        self._available = threading.Condition(threading.Lock())
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def checkout(self):
+        """ Return an idle connection, a new one, or wait for one """
+        start = time.monotonic()
+        waited = False
+        with self._available:
+            while not self._idle and self._size >= self.max_size:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        'No connection available within {}s'.format(
+                            self.timeout))
+                waited = True
+                self._available.wait(remaining)
+
+            self.checkouts += 1
+            if waited:
+                elapsed = time.monotonic() - start
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait_time = max(self.max_wait_time, elapsed)
+            if self._idle:
+                connection, idle_since = self._idle.pop()
+            else:
+                connection, idle_since = None, None
+            # Reserve the slot now, connecting happens outside the lock
+            if connection is None:
+                self._size += 1
+
+        if connection is not None:
+            if self._is_healthy(connection, idle_since):
+                return connection
+            self._discard(connection, reserved=True)
+        try:
+            connection = self.connect()
+        except Exception:
+            self._release_slot()
+            raise
+        with self._available:
+            self.created += 1
+        return connection
+
+    def checkin(self, connection):
+        """ Give a connection back, or drop it if it cannot be reset """
+        if self.reset is not None:
+            try:
+                usable = self.reset(connection)
+            except Exception:
+                usable = False
+            if not usable:
+                self._discard(connection)
+                return
+        with self._available:
+            self._idle.append((connection, time.monotonic()))
+            self._available.notify()
+
+    def close(self):
+        """ Close every idle connection """
+        with self._available:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        """ Return the pool counters """
+        with self._available:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time': round(self.wait_time, 6),
+                'max_wait_time': round(self.max_wait_time, 6),
+            }
+
+    def _is_healthy(self, connection, idle_since):
+        if self.is_usable is None or \
+                time.monotonic() - idle_since < self.health_check_idle:
+            return True
+        try:
+            return self.is_usable(connection)
+        except Exception:
+            return False
+
+    def _discard(self, connection, reserved=False):
+        """ Close a connection, a reserved slot is kept for its caller """
+        self._close(connection)
+        with self._available:
+            self.discarded += 1
+            if not reserved:
+                self._size -= 1
+                self._available.notify()
+
+    def _release_slot(self):
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
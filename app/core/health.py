@@ -0,0 +1,50 @@
+"""
+    Database probes shared by wait_for_db and the readiness endpoint.
+"""
+from django.db import connections
+from django.db.utils import InterfaceError, OperationalError
+
+
+def check_database(alias='default'):
+    """ Open the connection of alias if needed and run SELECT 1 on it """
+    connection = connections[alias]
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def close_broken_connection(alias, exc):
+    """
+        Close the connection of alias after the probe failed with exc, so
+        the next probe opens a fresh one. Only connection errors close it,
+        and never inside a transaction, which would lose its work.
+    """
+    connection = connections[alias]
+    if isinstance(exc, (OperationalError, InterfaceError)) and \
+            not connection.in_atomic_block:
+        connection.close()
+
+
+def database_errors(aliases=None):
+    """ Return {alias: error message} of the databases failing the probe """
+    errors = {}
+    for alias in aliases or connections:
+        try:
+            check_database(alias)
+        except Exception as exc:
+            errors[alias] = str(exc) or exc.__class__.__name__
+            close_broken_connection(alias, exc)
+    return errors
+
+
+def check_persistent_connections(**kwargs):
+    """
+        request_started receiver closing persistent connections that
+        stopped working while idle, so the request opens a fresh one
+    """
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
@@ -0,0 +1,276 @@
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import QueryCounter, compare, summarize
+from core.models import Ingredient, Recipe
+
+from recipe.bulk import bulk_create_returning
+
+
+# Users are named after the size of their data, so runs with other
+# --recipes or --ingredients never reuse a dataset of another shape
+BENCH_EMAIL = 'bench-user-{n}-{recipes}r-{ingredients}i@bench.local'
+BENCH_PASSWORD = 'bench-password'
+
+# name: (method, URL name, needs a recipe id, authenticated)
+SCENARIOS = {
+    'recipe-list': ('get', 'recipe:recipe-list', False, True),
+    'recipe-detail': ('get', 'recipe:recipe-detail', True, True),
+    'ingredient-list': ('get', 'recipe:ingredient-list', False, True),
+    'user-token': ('post', 'user:token', False, False),
+    'user-me': ('get', 'user:me', False, True),
+}
+
+
+class Command(BaseCommand):
+    """ Django command benchmarking the recipe and user API routes """
+    help = 'Seed a benchmark dataset, drive the API routes with ' \
+           'concurrent clients and report throughput, latency and queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            choices=sorted(SCENARIOS),
+            help='Scenario to run, may be given several times (default: all)'
+        )
+        parser.add_argument(
+            '--users', type=int, default=4, help='Benchmark users'
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=200, help='Recipes per user'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=50,
+            help='Ingredients per user'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per scenario'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Concurrent clients, each on its own thread'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0, help='Random seed'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Disable the response cache so every request queries'
+        )
+        parser.add_argument(
+            '--output', help='Write the results as JSON to this file'
+        )
+        parser.add_argument(
+            '--baseline', help='Compare with the results saved in this file'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help='Relative change counted as a regression'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when a scenario regressed'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        self.random = random.Random(options['seed'])
+        users = self.seed(
+            options['users'], options['recipes'], options['ingredients']
+        )
+        report = {
+            'version': 1,
+            'created': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'config': {
+                key: options[key] for key in (
+                    'users', 'recipes', 'ingredients', 'requests',
+                    'concurrency', 'seed', 'no_cache'
+                )
+            },
+            'dataset': self.dataset(users),
+            'results': [],
+        }
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if options['no_cache']:
+            overrides['API_CACHE_ALIAS'] = None
+        with override_settings(**overrides):
+            for name in options['scenarios'] or sorted(SCENARIOS):
+                report['results'].append(self.run_scenario(
+                    name, users, options['requests'], options['concurrency']
+                ))
+
+        if baseline is not None:
+            report['comparison'] = compare(
+                baseline, report, options['tolerance']
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_report(report)
+
+        regressed = [
+            row['scenario'] for row in report.get('comparison', [])
+            if row['regressed']
+        ]
+        if regressed and options['fail_on_regression']:
+            raise CommandError('Regressed: {}'.format(', '.join(regressed)))
+
+    def seed(self, users, recipes, ingredients):
+        """
+            Create the benchmark users and their data, unless a previous run
+            with the same sizes already did. Return
+            [(user, token key, [recipe ids])].
+        """
+        seeded = []
+        for n in range(users):
+            email = BENCH_EMAIL.format(
+                n=n, recipes=recipes, ingredients=ingredients
+            )
+            user = get_user_model().objects.filter(email=email).first()
+            if user is None:
+                # A user is only left behind with all of its data
+                with transaction.atomic():
+                    user = get_user_model().objects.create_user(
+                        email, BENCH_PASSWORD
+                    )
+                    self.seed_recipes(user, recipes, ingredients)
+            token = Token.objects.get_or_create(user=user)[0]
+            recipe_ids = list(Recipe.objects.filter(
+                user=user).values_list('id', flat=True))
+            seeded.append((user, token.key, recipe_ids))
+        return seeded
+
+    def dataset(self, users):
+        """ Return the counts of the data the scenarios actually run on """
+        return {
+            'users': len(users),
+            'recipes': sum(len(recipe_ids) for _, _, recipe_ids in users),
+            'ingredients': Ingredient.objects.filter(
+                user__in=[user for user, _, _ in users]
+            ).count(),
+        }
+
+    def seed_recipes(self, user, recipes, ingredients):
+        """ Create the recipes of a user, each with a few ingredients """
+        pantry = bulk_create_returning(Ingredient, [
+            Ingredient(user=user, name='Ingredient {}'.format(i))
+            for i in range(ingredients)
+        ])
+        created = bulk_create_returning(Recipe, [
+            Recipe(user=user, name='Recipe {}'.format(i), text='Text')
+            for i in range(recipes)
+        ])
+        through = Recipe.ingredients.through
+        links = []
+        for recipe in created:
+            for ingredient in self.random.sample(
+                    pantry, min(len(pantry), 5)):
+                links.append(through(
+                    recipe_id=recipe.id, ingredient_id=ingredient.id
+                ))
+        through.objects.bulk_create(links)
+
+    def run_scenario(self, name, users, requests, concurrency):
+        """ Send requests to a scenario's route and summarize them """
+        method, url_name, detail, authenticated = SCENARIOS[name]
+        calls = []
+        for i in range(requests):
+            user, key, recipe_ids = users[i % len(users)]
+            if detail:
+                if not recipe_ids:
+                    raise CommandError('{} needs recipes'.format(name))
+                path = reverse(url_name, args=[
+                    recipe_ids[i % len(recipe_ids)]])
+            else:
+                path = reverse(url_name)
+            kwargs = {}
+            if authenticated:
+                kwargs['HTTP_AUTHORIZATION'] = 'Token ' + key
+            else:
+                kwargs['data'] = {
+                    'email': user.email, 'password': BENCH_PASSWORD
+                }
+            calls.append((method, path, kwargs))
+
+        def call(args):
+            method, path, kwargs = args
+            counter = QueryCounter()
+            start = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = getattr(Client(), method)(path, **kwargs)
+            elapsed = time.perf_counter() - start
+            return elapsed, counter, response.status_code < 400
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            outcomes = [call(args) for args in calls]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(call, calls))
+        elapsed = time.perf_counter() - start
+
+        queries = sum(counter.queries for _, counter, _ in outcomes)
+        db_time = sum(counter.seconds for _, counter, _ in outcomes)
+        result = {'scenario': name, 'method': method.upper()}
+        result.update(summarize([o[0] for o in outcomes], elapsed))
+        result.update({
+            'errors': sum(1 for _, _, ok in outcomes if not ok),
+            'queries_per_request': round(queries / len(outcomes), 2),
+            'db_ms_per_request': round(db_time / len(outcomes) * 1000, 3),
+        })
+        return result
+
+    def print_report(self, report):
+        self.stdout.write(
+            '{:<16} {:>9} {:>9} {:>9} {:>8} {:>9} {:>6}'.format(
+                'scenario', 'req/s', 'p50 ms', 'p99 ms', 'queries',
+                'db ms', 'errors'
+            )
+        )
+        for r in report['results']:
+            self.stdout.write(
+                '{scenario:<16} {requests_per_sec:>9} {p50_ms:>9} '
+                '{p99_ms:>9} {queries_per_request:>8} '
+                '{db_ms_per_request:>9} {errors:>6}'.format(**r)
+            )
+        for row in report.get('comparison', []):
+            line = '{}: req/s {}, p99 {}'.format(
+                row['scenario'],
+                _percent(row['requests_per_sec_change']),
+                _percent(row['p99_ms_change'])
+            )
+            if row['regressed']:
+                self.stdout.write(self.style.ERROR(line + ' REGRESSED'))
+            else:
+                self.stdout.write(line)
+
+
+def _percent(change):
+    return 'n/a' if change is None else '{:+.1%}'.format(change)
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from user.hashing import HashingPool
+
+
+class Command(BaseCommand):
+    """ Django command to measure password checks per second """
+    help = 'Benchmark logins per second and per core for the configured ' \
+           'password hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, action='append',
+            help='PBKDF2 iterations to measure, may be given several times '
+                 '(default: PASSWORD_HASH_ITERATIONS)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+            help='Hashing pool threads'
+        )
+        parser.add_argument(
+            '--logins', type=int, default=50,
+            help='Password checks to run per measurement'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        for iterations in (options['iterations'] or
+                           [settings.PASSWORD_HASH_ITERATIONS]):
+            with override_settings(PASSWORD_HASH_ITERATIONS=iterations):
+                results.append(self.measure(
+                    iterations, options['workers'], options['logins']
+                ))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                '{iterations:>8} iterations  {workers} workers  '
+                '{logins_per_sec:>8.1f} logins/s  '
+                '{logins_per_sec_per_core:>8.1f} logins/s/core'.format(
+                    **result)
+            )
+
+    def measure(self, iterations, workers, logins):
+        """ Check the same password logins times on a fresh pool """
+        encoded = make_password('benchmark-password')
+        pool = HashingPool(workers=workers, max_pending=logins)
+
+        async def run():
+            await asyncio.gather(*[
+                pool.check_password('benchmark-password', encoded)
+                for _ in range(logins)
+            ])
+
+        loop = asyncio.new_event_loop()
+        try:
+            start = time.perf_counter()
+            loop.run_until_complete(run())
+            elapsed = time.perf_counter() - start
+        finally:
+            loop.close()
+            pool.shutdown()
+
+        cores = min(workers, os.cpu_count() or 1)
+        return {
+            'iterations': iterations,
+            'workers': workers,
+            'logins': logins,
+            'seconds': round(elapsed, 4),
+            'logins_per_sec': round(logins / elapsed, 2),
+            'logins_per_sec_per_core': round(logins / elapsed / cores, 2),
+        }
@@ -0,0 +1,100 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import DatasetGenerator, seed_dataset
+
+
+class Command(BaseCommand):
+    """ Django command generating a synthetic dataset for scale testing """
+    help = 'Generate users with skewed ingredient vocabularies and recipes, ' \
+           'reproducibly from a seed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--ingredients-per-user', type=int, default=200,
+            help='Pantry size of every user'
+        )
+        parser.add_argument(
+            '--recipes-per-user', type=int, default=500,
+            help='Mean recipes per user, the actual counts are log-normal'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            help='Mean ingredients per recipe'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of ingredient popularity, 0 is uniform'
+        )
+        parser.add_argument(
+            '--spread', type=float, default=1.0,
+            help='Log-normal sigma of recipes per user, 0 gives every user '
+                 'the same count'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Rows written per COPY or bulk_create'
+        )
+        parser.add_argument(
+            '--user-batch', type=int, default=50,
+            help='Users generated and committed together'
+        )
+        parser.add_argument(
+            '--email-prefix', default='seed',
+            help='Users get <prefix>-<seed>-<n>@seed.local emails'
+        )
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create on PostgreSQL too'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the counts as JSON'
+        )
+
+    def handle(self, *args, **options):
+        prefix = '{}-{}-'.format(options['email_prefix'], options['seed'])
+        if get_user_model().objects.filter(
+                email__startswith=prefix).exists():
+            raise CommandError(
+                'Users {}* exist already, use another --seed or '
+                '--email-prefix'.format(prefix)
+            )
+
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            ingredients_per_user=options['ingredients_per_user'],
+            recipes_per_user=options['recipes_per_user'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            skew=options['skew'],
+            spread=options['spread'],
+        )
+        start = time.perf_counter()
+        counts = seed_dataset(
+            generator, options['users'],
+            email_prefix=options['email_prefix'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            user_batch=options['user_batch'],
+            use_copy=not options['no_copy'],
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(counts.values())
+        counts.update({
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows / elapsed) if elapsed else None,
+        })
+
+        if options['json']:
+            self.stdout.write(json.dumps(counts))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            'Created {users} users, {ingredients} ingredients, {recipes} '
+            'recipes and {links} recipe ingredients in {seconds}s '
+            '({rows_per_sec} rows/s)'.format(**counts)
+        ))
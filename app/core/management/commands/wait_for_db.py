@@ -1,30 +1,74 @@
-
 import time
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from core.health import check_database, close_broken_connection
 
 
 class Command(BaseCommand):
     """ Django command to pause execution until db is available """
+    help = 'Wait until every given database accepts a connection and ' \
+           'answers SELECT 1'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Database alias to wait for, may be given several times '
+                 '(default: every configured database)'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait before giving up, 0 waits forever'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0.5,
+            help='Seconds to wait after the first failed attempt, doubled '
+                 'after every further one'
+        )
+        parser.add_argument(
+            '--max-interval', type=float, default=5,
+            help='Longest wait between two attempts'
+        )
 
     def handle(self, *args, **options):
         """
-            - allow for passing in custom arguments and options to our
-            management commands just in case we want to customize the wait time
-            for example
-
+            Probe each database until it answers, backing off exponentially
+            between attempts, or fail once the timeout has passed
         """
-        self.stdout.write('Waiting for database. . .')
-        db_conn = None
-        while not db_conn:
+        aliases = options['databases'] or list(connections)
+        deadline = None
+        if options['timeout']:
+            deadline = time.monotonic() + options['timeout']
+
+        for alias in aliases:
+            self.stdout.write('Waiting for database {}. . .'.format(alias))
+            self.wait(alias, deadline, options)
+            self.stdout.write(self.style.SUCCESS(
+                'Database {} available!'.format(alias)))
+
+    def wait(self, alias, deadline, options):
+        """ Return once alias answers the probe """
+        interval = options['interval']
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second')
-                time.sleep(1)
+                check_database(alias)
+                return
+            except OperationalError as exc:
+                close_broken_connection(alias, exc)
+                error = exc
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
-        
+            delay = interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        'Database {} unavailable after {:g}s: {}'.format(
+                            alias, options['timeout'], error)
+                    )
+                delay = min(delay, remaining)
+            self.stdout.write('Database {} unavailable, waiting {:g} '
+                              'seconds'.format(alias, delay))
+            time.sleep(delay)
+            interval = min(interval * 2, options['max_interval'])
@@ -0,0 +1,200 @@
+"""
+    Opt-in per-request instrumentation.
+
+    With REQUEST_INSTRUMENTATION on, every request records its queries and
+    the time spent in the database, in the view and in rendering the
+    response. The timings are sent back in a Server-Timing header and
+    logged as one JSON line on the core.instrumentation logger. A query
+    run REQUEST_INSTRUMENTATION_DUPLICATES times or more in one request is
+    logged as a warning with the code that ran it first.
+
+    When the setting is off the middleware removes itself from the chain
+    by raising MiddlewareNotUsed, so it costs nothing.
+
+    The middleware is sync and async capable. Queries are recorded by an
+    execute wrapper installed once on every connection, which hands them
+    to the recorder of the current request through a context variable,
+    so the queries the async views run through sync_to_async on other
+    threads are counted too.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import time
+import traceback
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger('core.instrumentation')
+
+# QueryRecorder of the request being handled in this context
+current_recorder = contextvars.ContextVar(
+    'core.instrumentation.recorder', default=None
+)
+
+
+def record_queries(execute, sql, params, many, context):
+    """ Execute wrapper passing queries to the current request's recorder """
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    """ Wrap the queries of a connection with record_queries, once """
+    if record_queries not in connection.execute_wrappers:
+        # First, as execute_wrapper() blocks remove the last wrapper
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+class QueryRecorder:
+    """ Execute wrapper counting queries, their time and call sites """
+
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.call_sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+            if sql not in self.call_sites:
+                self.call_sites[sql] = self.call_site()
+
+    def call_site(self):
+        """ Return 'file:line in function' of the innermost project frame """
+        for frame in reversed(traceback.extract_stack()[:-2]):
+            filename = frame.filename
+            if filename.startswith(self.project_dir) and \
+                    filename != __file__:
+                return '{}:{} in {}'.format(
+                    os.path.relpath(filename, self.project_dir),
+                    frame.lineno, frame.name
+                )
+        return None
+
+    def duplicates(self, threshold):
+        """ Return [(sql, count, call site)] of repeated statements """
+        return [
+            (sql, count, self.call_sites[sql])
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class InstrumentationMiddleware:
+    """ Record SQL and timings of every request, see the module docstring """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.threshold = settings.REQUEST_INSTRUMENTATION_DUPLICATES
+        self.project_dir = str(settings.BASE_DIR)
+        connection_created.connect(
+            install_query_recorder, dispatch_uid='core.instrumentation'
+        )
+        if asyncio.iscoroutinefunction(get_response):
+            # What marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        # Connections of this thread may predate connection_created
+        for connection in connections.all():
+            install_query_recorder(connection)
+        recorder, start, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder, start, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    def start(self, request):
+        """ Start recording a request, return (recorder, start, token) """
+        recorder = QueryRecorder(self.project_dir)
+        request._instrumentation = {'view_end': None, 'render_end': None}
+        token = current_recorder.set(recorder)
+        return recorder, time.perf_counter(), token
+
+    def finish(self, request, response, recorder, start):
+        """ Add the Server-Timing header and log the request """
+        end = time.perf_counter()
+        timings = self.timings(request._instrumentation, start, end)
+        duplicates = recorder.duplicates(self.threshold)
+        # Inner middleware may have added metrics of their own
+        response['Server-Timing'] = ', '.join(filter(None, (
+            self.server_timing(recorder, timings),
+            response.get('Server-Timing'),
+        )))
+        self.log(request, response, recorder, timings, duplicates)
+        return response
+
+    def process_template_response(self, request, response):
+        """ Mark the end of the view, DRF responses are rendered next """
+        marks = request._instrumentation
+        marks['view_end'] = time.perf_counter()
+        response.add_post_render_callback(
+            lambda response: marks.update(render_end=time.perf_counter())
+        )
+        return response
+
+    def timings(self, marks, start, end):
+        """ Return the view, render and total durations in ms """
+        timings = {'total': (end - start) * 1000}
+        if marks['view_end'] is not None and marks['render_end'] is not None:
+            timings['view'] = (marks['view_end'] - start) * 1000
+            timings['render'] = (marks['render_end'] - marks['view_end']) \
+                * 1000
+        return {name: round(ms, 3) for name, ms in timings.items()}
+
+    def server_timing(self, recorder, timings):
+        metrics = ['db;dur={:.3f};desc="{} queries"'.format(
+            recorder.seconds * 1000, recorder.queries
+        )]
+        for name in ('view', 'render', 'total'):
+            if name in timings:
+                metrics.append('{};dur={:.3f}'.format(name, timings[name]))
+        return ', '.join(metrics)
+
+    def log(self, request, response, recorder, timings, duplicates):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.queries,
+            'db_ms': round(recorder.seconds * 1000, 3),
+            'duplicate_queries': sum(count for _, count, _ in duplicates),
+            **timings,
+        }))
+        for sql, count, call_site in duplicates:
+            logger.warning(
+                'Query run %d times by %s %s, first from %s: %s',
+                count, request.method, request.path, call_site, sql
+            )
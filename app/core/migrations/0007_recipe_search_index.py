@@ -0,0 +1,38 @@
+# Generated by Django 3.1.14 on 2026-10-18 05:02
+
+from django.db import migrations
+
+
+# Kept identical to recipe.search.SEARCH_DOCUMENT_SQL so the planner
+# can use the index for recipe searches
+CREATE_INDEX = """
+    CREATE INDEX recipe_search_idx ON core_recipe USING gin ((
+        to_tsvector('english'::regconfig,
+                    COALESCE("name", '') || ' ' || COALESCE("text", ''))
+    ))
+"""
+
+DROP_INDEX = 'DROP INDEX IF EXISTS recipe_search_idx'
+
+
+def create_search_index(apps, schema_editor):
+    """ Create the full-text GIN index, PostgreSQL only """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    """ Drop the full-text GIN index """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.14 on 2026-10-18 04:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.user'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.user'),
+        ),
+        # Lets ingredient-side lookups (assigned_only, deletes) read the
+        # through table from the index alone
+        migrations.RunSQL(
+            'CREATE INDEX recipe_ingredients_rev_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id)',
+            'DROP INDEX recipe_ingredients_rev_idx',
+        ),
+    ]
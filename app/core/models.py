@@ -44,8 +44,21 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        # Every lookup by user is served by the composite index below
+        db_index=False
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Serves per-user lookups by name, the list ordering and its
+            # keyset pagination
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='ingredient_user_name_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -55,10 +68,36 @@ class Recipe(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        # Every lookup by user is served by the composite index below
+        db_index=False
     )
     text = models.TextField()
     ingredients = models.ManyToManyField('Ingredient')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Serves the per-user list ordering and its keyset pagination
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RefreshToken(models.Model):
+    """ Long lived token exchanged for signed access tokens """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='refresh_tokens'
+    )
+    # SHA-256 of the secret, the secret itself is never stored
+    key_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.user_id, self.created_at)
@@ -0,0 +1,243 @@
+"""
+    Synthetic users, ingredients and recipes for scale testing.
+
+    Everything is drawn from a random.Random seeded per user, so a dataset
+    is the same for a given seed however it is batched. Recipe counts per
+    user follow a log-normal distribution and ingredients are picked with
+    Zipf weights, a few pantry staples end up in most recipes and the long
+    tail in few. Rows are written in bounded batches, with COPY on
+    PostgreSQL and bulk_create elsewhere.
+"""
+import csv
+import io
+import itertools
+import math
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe
+
+
+VOCABULARY = (
+    'salt', 'black pepper', 'olive oil', 'garlic', 'onion', 'butter',
+    'flour', 'sugar', 'egg', 'milk', 'tomato', 'lemon', 'parsley', 'basil',
+    'thyme', 'rosemary', 'oregano', 'cumin', 'paprika', 'chili flakes',
+    'ginger', 'soy sauce', 'rice', 'pasta', 'potato', 'carrot', 'celery',
+    'leek', 'spinach', 'kale', 'mushroom', 'bell pepper', 'zucchini',
+    'eggplant', 'broccoli', 'cauliflower', 'peas', 'corn', 'chickpeas',
+    'lentils', 'black beans', 'chicken breast', 'chicken thigh', 'beef',
+    'pork', 'lamb', 'salmon', 'cod', 'shrimp', 'tofu', 'bacon', 'parmesan',
+    'cheddar', 'feta', 'mozzarella', 'yogurt', 'cream', 'coconut milk',
+    'vinegar', 'honey', 'mustard', 'cinnamon', 'nutmeg', 'vanilla',
+    'baking powder', 'yeast', 'breadcrumbs', 'walnuts', 'almonds',
+    'pine nuts', 'avocado', 'lime', 'coriander', 'mint', 'dill',
+    'spring onion', 'shallot', 'capers', 'olives', 'anchovies', 'cabbage',
+    'beetroot', 'sweet potato', 'pumpkin', 'apple', 'pear', 'banana',
+    'strawberries', 'blueberries', 'chocolate', 'oats', 'quinoa',
+    'couscous', 'noodles', 'stock', 'white wine', 'red wine', 'tahini',
+)
+ADJECTIVES = (
+    'Spicy', 'Roasted', 'Creamy', 'Crispy', 'Smoky', 'Quick', 'Rustic',
+    'Grilled', 'Braised', 'Fresh', 'Slow-cooked', 'Baked', 'Tangy', 'Easy',
+)
+DISHES = (
+    'soup', 'stew', 'salad', 'curry', 'pie', 'bake', 'stir fry', 'pasta',
+    'risotto', 'tacos', 'bowl', 'casserole', 'skewers', 'tart', 'sandwich',
+)
+
+
+class DatasetGenerator:
+    """ Draws the contents of the synthetic dataset """
+
+    def __init__(self, seed=0, ingredients_per_user=200, recipes_per_user=500,
+                 ingredients_per_recipe=8, skew=1.1, spread=1.0):
+        self.seed = seed
+        self.ingredients_per_user = ingredients_per_user
+        self.recipes_per_user = recipes_per_user
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.spread = spread
+        # Zipf weights over a pantry ordered from staple to rarity
+        self.cum_weights = list(itertools.accumulate(
+            1.0 / (rank ** skew)
+            for rank in range(1, ingredients_per_user + 1)
+        ))
+
+    def rng(self, user_number):
+        return random.Random('{}:{}'.format(self.seed, user_number))
+
+    def ingredient_names(self, rng):
+        """ Return the pantry of a user, most used first """
+        names = list(VOCABULARY)
+        rng.shuffle(names)
+        pantry = names[:self.ingredients_per_user]
+        # Pantries larger than the vocabulary get regional variants
+        variant = 2
+        while len(pantry) < self.ingredients_per_user:
+            pantry.extend(
+                '{} {}'.format(name, variant)
+                for name in names[:self.ingredients_per_user - len(pantry)]
+            )
+            variant += 1
+        return pantry
+
+    def recipe_count(self, rng):
+        """ Log-normal around recipes_per_user, a few users have many """
+        scale = math.exp(self.spread ** 2 / 2)
+        value = rng.lognormvariate(0, self.spread) / scale
+        return max(1, int(round(self.recipes_per_user * value)))
+
+    def recipe(self, rng, pantry):
+        """ Return (name, text, [pantry indexes]) of a recipe """
+        size = min(
+            len(pantry),
+            max(1, int(rng.gauss(self.ingredients_per_recipe, 2)))
+        )
+        picked = set()
+        indexes = range(len(pantry))
+        while len(picked) < size:
+            picked.update(rng.choices(
+                indexes, cum_weights=self.cum_weights, k=size - len(picked)
+            ))
+        main = pantry[min(picked)]
+        name = '{} {} {}'.format(
+            rng.choice(ADJECTIVES), main, rng.choice(DISHES)
+        )
+        text = 'Combine the {}. Cook for {} minutes.'.format(
+            ', '.join(pantry[i] for i in sorted(picked)),
+            rng.randrange(5, 120, 5)
+        )
+        return name, text, sorted(picked)
+
+
+class RowWriter:
+    """ Writes rows in batches with COPY or bulk_create """
+
+    def __init__(self, batch_size=10000, use_copy=True):
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.rows = 0
+
+    def write(self, model, fields, rows):
+        """
+            Insert rows, tuples of the values of fields (attribute names),
+            in batches
+        """
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return
+            if self.use_copy:
+                self._copy(model, fields, batch)
+            else:
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in batch],
+                    batch_size=self.batch_size
+                )
+            self.rows += len(batch)
+
+    def _copy(self, model, fields, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(f).column)
+            for f in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+                    connection.ops.quote_name(model._meta.db_table), columns
+                ),
+                buffer
+            )
+
+
+def seed_dataset(generator, users, email_prefix='seed',
+                 password='seed-password', batch_size=10000,
+                 user_batch=50, use_copy=True):
+    """
+        Create users with their pantries and recipes. Users are handled
+        user_batch at a time, each in one transaction. Return the number
+        of rows written per table.
+    """
+    writer = RowWriter(batch_size, use_copy)
+    counts = {'users': 0, 'ingredients': 0, 'recipes': 0, 'links': 0}
+    # Hashing is by far the slowest part of creating a user, every
+    # synthetic user shares the same password
+    encoded = make_password(password)
+    user_model = get_user_model()
+    for first in range(0, users, user_batch):
+        numbers = range(first, min(first + user_batch, users))
+        with transaction.atomic():
+            _seed_users(
+                generator, writer, user_model, numbers, email_prefix,
+                encoded, counts
+            )
+    return counts
+
+
+def _seed_users(generator, writer, user_model, numbers, email_prefix,
+                encoded, counts):
+    emails = [
+        '{}-{}-{}@seed.local'.format(email_prefix, generator.seed, n)
+        for n in numbers
+    ]
+    user_model.objects.bulk_create([
+        user_model(email=email, password=encoded, first_name='Seed')
+        for email in emails
+    ], batch_size=writer.batch_size)
+    user_ids = dict(user_model.objects.filter(
+        email__in=emails).values_list('email', 'id'))
+    counts['users'] += len(emails)
+
+    now = timezone.now()
+    plans = []
+    for n, email in zip(numbers, emails):
+        rng = generator.rng(n)
+        plans.append((user_ids[email], rng, generator.ingredient_names(rng)))
+
+    writer.write(Ingredient, ('user_id', 'name', 'updated_at'), (
+        (user_id, name, now)
+        for user_id, _, pantry in plans for name in pantry
+    ))
+    pantry_ids = _ids_by_user(Ingredient, [p[0] for p in plans])
+    counts['ingredients'] += sum(len(ids) for ids in pantry_ids.values())
+
+    recipes = []
+    for user_id, rng, pantry in plans:
+        recipes.append((user_id, [
+            generator.recipe(rng, pantry)
+            for _ in range(generator.recipe_count(rng))
+        ]))
+    writer.write(Recipe, ('user_id', 'name', 'text', 'updated_at'), (
+        (user_id, name, text, now)
+        for user_id, drawn in recipes for name, text, _ in drawn
+    ))
+    recipe_ids = _ids_by_user(Recipe, [r[0] for r in recipes])
+    counts['recipes'] += sum(len(ids) for ids in recipe_ids.values())
+
+    through = Recipe.ingredients.through
+
+    def links():
+        for user_id, drawn in recipes:
+            ingredient_ids = pantry_ids[user_id]
+            for recipe_id, (_, _, picked) in zip(recipe_ids[user_id], drawn):
+                for index in picked:
+                    counts['links'] += 1
+                    yield recipe_id, ingredient_ids[index]
+    writer.write(through, ('recipe_id', 'ingredient_id'), links())
+
+
+def _ids_by_user(model, user_ids):
+    """ Return {user id: [ids in insertion order]} for fresh users """
+    ids = {user_id: [] for user_id in user_ids}
+    rows = model.objects.filter(user_id__in=user_ids).order_by('id') \
+        .values_list('user_id', 'id')
+    for user_id, pk in rows.iterator():
+        ids[user_id].append(pk)
+    return ids
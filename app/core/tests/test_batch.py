@@ -0,0 +1,230 @@
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+from user.authentication import token_cache
+
+
+BATCH_URL = reverse('batch')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class PublicBatchApiTests(TestCase):
+    """ Test the batch endpoint without credentials """
+
+    def test_auth_required(self):
+        """ Test a batch needs an authenticated user """
+        res = APIClient().post(BATCH_URL, {'operations': [
+            {'method': 'GET', 'path': RECIPES_URL}
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BatchApiTests(TestCase):
+    """ Test running API operations in a batch """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _batch(self, operations, **options):
+        return self.client.post(BATCH_URL, dict(
+            operations=operations, **options
+        ), format='json')
+
+    def test_operations_run_in_order(self):
+        """ Test each operation sees the writes of the previous ones """
+        res = self._batch([
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Salt'}},
+            {'method': 'GET', 'path': INGREDIENTS_URL},
+            {'method': 'GET', 'path': RECIPES_URL + '?fields=name'},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual([r['status'] for r in results], [201, 200, 200])
+        self.assertEqual(results[0]['body']['name'], 'Salt')
+        self.assertEqual(results[1]['body'], [results[0]['body']])
+        self.assertTrue(res.data['committed'])
+
+    def test_params(self):
+        """ Test params are sent as the query string """
+        Recipe.objects.create(user=self.user, name='Soup', text='Text')
+
+        res = self._batch([{
+            'method': 'GET', 'path': RECIPES_URL,
+            'params': {'fields': 'name'},
+        }])
+
+        self.assertEqual(res.data['results'][0]['body'], [{'name': 'Soup'}])
+
+    def test_failures_reported_per_operation(self):
+        """ Test failing operations do not stop a non atomic batch """
+        res = self._batch([
+            {'method': 'POST', 'path': INGREDIENTS_URL, 'body': {}},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': BATCH_URL},
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Salt'}},
+        ])
+
+        self.assertEqual(
+            [r['status'] for r in res.data['results']], [400, 404, 400, 201]
+        )
+        self.assertIn('name', res.data['results'][0]['body'])
+        self.assertTrue(Ingredient.objects.filter(name='Salt').exists())
+
+    def test_atomic_rollback(self):
+        """ Test an atomic batch is undone at the first failure """
+        res = self._batch([
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Salt'}},
+            {'method': 'POST', 'path': RECIPES_URL, 'body': {'name': 'Soup'}},
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Pepper'}},
+        ], atomic=True)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['committed'])
+        self.assertEqual([r['status'] for r in res.data['results']],
+                         [201, 400])
+        self.assertFalse(Ingredient.objects.exists())
+
+    @override_settings(API_CACHE_ALIAS='api')
+    def test_atomic_rollback_drops_cached_responses(self):
+        """ Test lists cached inside a rolled back batch are not served """
+        res = self._batch([
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Phantom'}},
+            {'method': 'GET', 'path': INGREDIENTS_URL},
+            {'method': 'POST', 'path': INGREDIENTS_URL, 'body': {}},
+        ], atomic=True)
+        self.assertFalse(res.data['committed'])
+
+        res = self.client.get(INGREDIENTS_URL)
+
+        self.assertEqual(res.data, [])
+
+    @override_settings(API_CACHE_ALIAS='api')
+    def test_atomic_exception_drops_cached_responses(self):
+        """ Test lists cached before an operation raised are not served """
+        with patch('recipe.views.RecipeViewSet.list',
+                   side_effect=IntegrityError('duplicate')), \
+                self.assertRaises(IntegrityError):
+            self._batch([
+                {'method': 'POST', 'path': INGREDIENTS_URL,
+                 'body': {'name': 'Phantom'}},
+                {'method': 'GET', 'path': INGREDIENTS_URL},
+                {'method': 'GET', 'path': RECIPES_URL},
+            ], atomic=True)
+
+        res = self.client.get(INGREDIENTS_URL)
+
+        self.assertEqual(res.data, [])
+
+    def test_atomic_commit(self):
+        """ Test an atomic batch without failures is committed """
+        res = self._batch([
+            {'method': 'POST', 'path': INGREDIENTS_URL,
+             'body': {'name': 'Salt'}},
+        ], atomic=True)
+
+        self.assertTrue(res.data['committed'])
+        self.assertEqual(Ingredient.objects.count(), 1)
+
+    def test_scoped_to_user(self):
+        """ Test operations run as the user of the batch """
+        other = get_user_model().objects.create_user(
+            'other@kosta.com', 'password123'
+        )
+        recipe = Recipe.objects.create(user=other, name='Theirs', text='T')
+
+        res = self._batch([{
+            'method': 'DELETE',
+            'path': reverse('recipe:recipe-detail', args=[recipe.id]),
+        }])
+
+        self.assertEqual(res.data['results'][0]['status'], 404)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    @override_settings(BATCH_MAX_OPERATIONS=2)
+    def test_invalid_batches(self):
+        """ Test malformed and oversized batches are rejected """
+        operation = {'method': 'GET', 'path': RECIPES_URL}
+        for operations in ([], [operation] * 3,
+                           [{'method': 'TRACE', 'path': RECIPES_URL}],
+                           [{'method': 'GET', 'path': '/admin/'}]):
+            res = self._batch(operations)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_authenticated_once(self):
+        """ Test the token is only looked up for the batch itself """
+        token_cache.clear()
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = client.post(BATCH_URL, {'operations': [
+                {'method': 'GET', 'path': RECIPES_URL},
+                {'method': 'GET', 'path': INGREDIENTS_URL},
+                {'method': 'GET', 'path': reverse('user:me')},
+            ]}, format='json')
+
+        self.assertEqual([r['status'] for r in res.data['results']],
+                         [200, 200, 200])
+        token_queries = [
+            q for q in queries.captured_queries
+            if 'authtoken_token' in q['sql']
+        ]
+        self.assertEqual(len(token_queries), 1)
+
+
+@override_settings(API_CACHE_ALIAS=None)
+class AsgiBatchApiTests(TestCase):
+    """ Test batches sent through the ASGI handler """
+
+    async def test_links_keep_the_scheme(self):
+        """ Test links built by operations use the scheme of the batch """
+        from asgiref.sync import sync_to_async
+
+        def setup():
+            user = get_user_model().objects.create_user(
+                'test@kosta.com', 'test123'
+            )
+            Recipe.objects.create(user=user, name='Soup', text='Text')
+            Recipe.objects.create(user=user, name='Stew', text='Text')
+            return Token.objects.create(user=user).key
+
+        key = await sync_to_async(setup, thread_sensitive=True)()
+
+        res = await AsyncClient().post(
+            BATCH_URL, {'operations': [{
+                'method': 'GET', 'path': RECIPES_URL,
+                'params': {'page_size': 1},
+            }]}, content_type='application/json',
+            AUTHORIZATION='Token ' + key
+        )
+
+        body = json.loads(res.content)['results'][0]['body']
+        self.assertTrue(body['next'].startswith('http://testserver/'),
+                        body['next'])
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from core.benchmark import compare
+from core.models import Recipe
+
+
+def result(scenario, rps, p99, queries):
+    return {
+        'scenario': scenario, 'requests_per_sec': rps, 'p99_ms': p99,
+        'queries_per_request': queries,
+    }
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class BenchCommandTests(TestCase):
+    """ Test the API benchmark command """
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.dir.name, 'bench.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _bench(self, **options):
+        out = StringIO()
+        options = dict(
+            dict(users=2, recipes=3, ingredients=4, requests=4,
+                 concurrency=1, json=True), **options
+        )
+        call_command('bench', stdout=out, **options)
+        return json.loads(out.getvalue())
+
+    def test_runs_every_scenario(self):
+        """ Test every route is driven without errors """
+        report = self._bench(output=self.output)
+
+        scenarios = {r['scenario'] for r in report['results']}
+        self.assertEqual(scenarios, {
+            'recipe-list', 'recipe-detail', 'ingredient-list',
+            'user-token', 'user-me'
+        })
+        for r in report['results']:
+            self.assertEqual(r['errors'], 0, r['scenario'])
+            self.assertEqual(r['requests'], 4)
+        with open(self.output) as f:
+            self.assertEqual(json.load(f)['results'], report['results'])
+
+    def test_seeds_once(self):
+        """ Test a second run reuses the dataset of the first """
+        self._bench(scenarios=['user-me'])
+        self._bench(scenarios=['user-me'])
+
+        self.assertEqual(Recipe.objects.count(), 6)
+
+    def test_reseeds_other_sizes(self):
+        """ Test a run with other sizes gets a dataset of those sizes """
+        self._bench(scenarios=['user-me'])
+
+        report = self._bench(scenarios=['user-me'], users=1, recipes=5)
+
+        self.assertEqual(report['dataset'], {
+            'users': 1, 'recipes': 5, 'ingredients': 4
+        })
+        self.assertEqual(Recipe.objects.count(), 11)
+
+    def test_counts_queries(self):
+        """ Test queries per request are reported """
+        report = self._bench(scenarios=['recipe-detail'], no_cache=True)
+
+        self.assertGreater(report['results'][0]['queries_per_request'], 0)
+
+    def test_compare_with_baseline(self):
+        """ Test a saved baseline is compared with the new run """
+        self._bench(scenarios=['user-me'], output=self.output)
+
+        report = self._bench(scenarios=['user-me'], baseline=self.output)
+
+        self.assertEqual(report['comparison'][0]['scenario'], 'user-me')
+
+    def test_fail_on_regression(self):
+        """ Test a regression fails the command when asked to """
+        with open(self.output, 'w') as f:
+            json.dump({'results': [result('user-me', 1e9, 0.001, 0)]}, f)
+
+        with self.assertRaises(CommandError):
+            self._bench(
+                scenarios=['user-me'], baseline=self.output,
+                fail_on_regression=True
+            )
+
+
+class CompareTests(TestCase):
+    """ Test comparing benchmark results """
+
+    def test_regressions(self):
+        """ Test throughput, latency and query regressions are flagged """
+        baseline = {'results': [
+            result('a', 100, 10, 2), result('b', 100, 10, 2),
+            result('c', 100, 10, 2), result('d', 100, 10, 2),
+        ]}
+        current = {'results': [
+            result('a', 95, 10.5, 2), result('b', 80, 10, 2),
+            result('c', 100, 12, 2), result('d', 100, 10, 3),
+        ]}
+
+        rows = {r['scenario']: r for r in compare(baseline, current, 0.1)}
+
+        self.assertFalse(rows['a']['regressed'])
+        self.assertTrue(rows['b']['regressed'])
+        self.assertTrue(rows['c']['regressed'])
+        self.assertTrue(rows['d']['regressed'])
+        self.assertEqual(rows['b']['requests_per_sec_change'], -0.2)
@@ -1,6 +1,7 @@
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
@@ -11,31 +12,55 @@ class Command(TestCase):
     def test_wait_for_db_ready(self):
         """
             Test waiting for db when db is available.
-            We will simulate connection to the database and check whether
-            we have some operational error or not.
-            If we have an error, db is unavailable.
-            In this method we override the behavior of the ConnectionHandler.
+            We simulate the connect and SELECT 1 probe: if it raises an
+            operational error, the db is unavailable.
         """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        with patch('core.management.commands.wait_for_db.check_database') \
+                as cd:
             # wait_for_db is going to be the name of the management command
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            cd.assert_called_once_with('default')
+
+    def test_wait_for_db_really_connects(self):
+        """ Test the probe opens a connection and runs a query """
+        call_command('wait_for_db', timeout=1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """
             Test waiting for db. This test will try the database five times and
             then on the sixth time it'll be successful and it will continue.
-            By using patch as a decorator we passed the return_value as part
-            of the function call.
-            The mock (patck) replaces the behavior of time.sleep and just
-            replaces with the mock function that returns True
-            It won't actually wait the second or however long you have to
-            wait in your code.
-            The reason is just to speed up the test
+            The mock (patch) replaces time.sleep so the test does not
+            actually wait, and lets us check the backoff between attempts.
         """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True] #first 5 time it will raise error
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch('core.management.commands.wait_for_db.check_database') \
+                as cd, patch('core.management.commands.wait_for_db.'
+                             'close_broken_connection') as close:
+            cd.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', interval=1, max_interval=5, timeout=0)
+            self.assertEqual(cd.call_count, 6)
+            self.assertEqual(close.call_count, 5)
+        self.assertEqual(
+            [c[0][0] for c in ts.call_args_list], [1, 2, 4, 5, 5]
+        )
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """ Test the command fails once the timeout has passed """
+        clock = iter([0, 1, 2, 11])
+        with patch('core.management.commands.wait_for_db.check_database') \
+                as cd, \
+                patch('core.management.commands.wait_for_db.'
+                      'close_broken_connection'), \
+                patch('time.monotonic', side_effect=lambda: next(clock)):
+            cd.side_effect = OperationalError
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', interval=1, timeout=10)
+        self.assertEqual(cd.call_count, 3)
+
+    def test_wait_for_db_aliases(self):
+        """ Test every given database alias is probed """
+        with patch('core.management.commands.wait_for_db.check_database') \
+                as cd:
+            call_command('wait_for_db', databases=['default', 'default'])
+        self.assertEqual(cd.call_count, 2)
@@ -0,0 +1,211 @@
+import asyncio
+import gzip
+import json
+import zlib
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import compression
+from core.compression import CompressionMiddleware, choose_encoding
+from core.models import Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class NegotiationTests(SimpleTestCase):
+    """ Test choosing an encoding from Accept-Encoding """
+    encodings = ['br', 'gzip', 'deflate']
+
+    def test_server_preference_on_ties(self):
+        """ Test the first configured encoding wins among equals """
+        self.assertEqual(choose_encoding('deflate, gzip', self.encodings),
+                         'gzip')
+
+    def test_q_values(self):
+        """ Test higher q values win and q=0 refuses an encoding """
+        self.assertEqual(
+            choose_encoding('gzip;q=0.5, deflate', self.encodings), 'deflate'
+        )
+        self.assertIsNone(choose_encoding('gzip;q=0', self.encodings))
+        self.assertIsNone(choose_encoding('identity', self.encodings))
+        self.assertIsNone(choose_encoding('', self.encodings))
+
+    def test_wildcard(self):
+        """ Test * stands for every encoding not listed """
+        self.assertEqual(
+            choose_encoding('br;q=0, *;q=0.1', self.encodings), 'gzip'
+        )
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=512,
+                   COMPRESSION_ENCODINGS=['br', 'gzip', 'deflate'],
+                   API_CACHE_ALIAS=None)
+class CompressionMiddlewareTests(TestCase):
+    """ Test the response compression middleware """
+
+    def setUp(self):
+        compression.stats.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, name='Recipe {}'.format(i),
+                   text='Simmer gently and season to taste')
+            for i in range(50)
+        ])
+
+    def _middleware(self, response):
+        return CompressionMiddleware(lambda request: response)
+
+    def test_gzip(self):
+        """ Test a large list is gzipped and decodes to the same JSON """
+        plain = self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertIn('compress;dur=', res['Server-Timing'])
+
+    def test_deflate(self):
+        """ Test deflate is the zlib format """
+        plain = self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='deflate')
+
+        self.assertEqual(res['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(res.content), plain.content)
+
+    @skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        """ Test brotli is preferred when accepted """
+        plain = self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(res.content), plain.content
+        )
+
+    def test_not_accepted(self):
+        """ Test clients without Accept-Encoding get the plain body """
+        res = self.client.get(RECIPES_URL)
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+    def test_streaming(self):
+        """ Test streamed exports are compressed chunk by chunk """
+        plain = b''.join(self.client.get(EXPORT_URL).streaming_content)
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)), plain
+        )
+        self.assertEqual(
+            compression.compression_stats()['encodings']['gzip']['bytes_in'],
+            len(plain)
+        )
+
+    def test_weak_etag(self):
+        """ Test the ETag is weakened and still validates """
+        with override_settings(API_CACHE_ALIAS='api'):
+            res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertTrue(res['ETag'].startswith('W/"'))
+
+            res = self.client.get(
+                RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip',
+                HTTP_IF_NONE_MATCH=res['ETag']
+            )
+            self.assertEqual(res.status_code, 304)
+
+    def test_skipped_responses(self):
+        """ Test small, binary, encoded and no-transform bodies are kept """
+        request = self.client.get(RECIPES_URL).wsgi_request
+        request.META['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        responses = {
+            'too_small': HttpResponse('x' * 100),
+            'content_type': HttpResponse(
+                b'x' * 1000, content_type='image/png'),
+            'encoded': HttpResponse(b'x' * 1000),
+            'no_transform': HttpResponse(b'x' * 1000),
+        }
+        responses['encoded']['Content-Encoding'] = 'gzip'
+        responses['no_transform']['Cache-Control'] = 'no-transform'
+
+        for reason, response in responses.items():
+            content = response.content
+            res = self._middleware(response)(request)
+            self.assertEqual(res.content, content)
+            self.assertEqual(
+                compression.compression_stats()['skipped'][reason], 1
+            )
+
+    def test_stats(self):
+        """ Test ratio and CPU time are reported by readyz to staff """
+        self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        res = self.client.get(reverse('readyz'), {'verbose': ''})
+
+        gzipped = json.loads(res.content)['compression']['encodings']['gzip']
+        self.assertEqual(gzipped['responses'], 1)
+        self.assertGreater(gzipped['ratio'], 1)
+        self.assertIn('cpu_ms_per_mb', gzipped)
+
+    @override_settings(COMPRESSION_ENABLED=False)
+    def test_disabled(self):
+        """ Test the middleware removes itself when disabled """
+        with self.assertRaises(MiddlewareNotUsed):
+            CompressionMiddleware(lambda request: None)
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=512,
+                   COMPRESSION_ENCODINGS=['gzip'])
+class AsyncCompressionTests(SimpleTestCase):
+    """ Test the middleware in an async middleware chain """
+    body = b'{"name": "Soup"}' * 100
+
+    async def test_async_response(self):
+        """ Test an async chain stays async and is compressed """
+        async def get_response(request):
+            return HttpResponse(self.body, content_type='application/json')
+        middleware = CompressionMiddleware(get_response)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        res = await middleware(request)
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), self.body)
+
+    @override_settings(DEBUG=True)
+    def test_not_adapted_under_asgi(self):
+        """ Test the ASGI handler does not run the middleware on a thread """
+        with mock.patch('django.core.handlers.base.logger.debug') as debug:
+            ASGIHandler()
+
+        adapted = [str(call) for call in debug.call_args_list]
+        self.assertFalse(
+            [line for line in adapted if 'CompressionMiddleware' in line],
+            adapted
+        )
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.middleware import InstrumentationMiddleware
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True, API_CACHE_ALIAS=None)
+class InstrumentationMiddlewareTests(TestCase):
+    """ Test the request instrumentation middleware """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """ Test the timings are sent in a Server-Timing header """
+        res = self.client.get(RECIPES_URL)
+
+        timing = res['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('view;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_structured_log_line(self):
+        """ Test one JSON line is logged per request """
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            self.client.get(RECIPES_URL)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['path'], RECIPES_URL)
+        self.assertEqual(line['status'], 200)
+        self.assertGreaterEqual(line['queries'], 1)
+
+    @override_settings(FAST_LIST_SERIALIZATION=False)
+    def test_duplicate_queries_flagged(self):
+        """ Test a query repeated per row is reported with its call site """
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user, name='Recipe {}'.format(i), text='Text'
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name='Salt')
+            )
+
+        # Serialize instances without the prefetch, one ingredients query
+        # per recipe
+        with patch('recipe.views.RecipeViewSet._prefetch_for_action',
+                   side_effect=lambda queryset: queryset), \
+                self.assertLogs('core.instrumentation', 'INFO') as logs:
+            self.client.get(RECIPES_URL)
+
+        warnings = [r for r in logs.records if r.levelname == 'WARNING']
+        self.assertEqual(len(warnings), 1)
+        self.assertIn('3 times', warnings[0].getMessage())
+        self.assertIn('core_recipe_ingredients', warnings[0].getMessage())
+        self.assertIn('.py:', warnings[0].getMessage())
+
+    @override_settings(REQUEST_INSTRUMENTATION=False)
+    def test_disabled(self):
+        """ Test the middleware removes itself when disabled """
+        with self.assertRaises(MiddlewareNotUsed):
+            InstrumentationMiddleware(lambda request: None)
+
+        self.assertNotIn('Server-Timing', self.client.get(RECIPES_URL))
+
+
+@override_settings(REQUEST_INSTRUMENTATION=True)
+class AsyncInstrumentationTests(TestCase):
+    """ Test the instrumentation in an async middleware chain """
+
+    async def test_queries_on_other_threads(self):
+        """ Test queries run through sync_to_async are recorded """
+        def query():
+            # A connection of its own, made after the middleware
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.close()
+
+        async def get_response(request):
+            await sync_to_async(query, thread_sensitive=False)()
+            return HttpResponse('ok')
+        middleware = InstrumentationMiddleware(get_response)
+
+        with self.assertLogs('core.instrumentation', 'INFO'):
+            res = await middleware(RequestFactory().get('/'))
+
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertIn('desc="1 queries"', res['Server-Timing'])
+
+    @override_settings(DEBUG=True)
+    def test_not_adapted_under_asgi(self):
+        """ Test the ASGI handler does not run the middleware on a thread """
+        with patch('django.core.handlers.base.logger.debug') as debug:
+            ASGIHandler()
+
+        adapted = [str(call) for call in debug.call_args_list]
+        self.assertFalse(
+            [line for line in adapted if 'InstrumentationMiddleware' in line],
+            adapted
+        )
@@ -0,0 +1,132 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.signals import request_started
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.db.pool import ConnectionPool, PoolTimeout
+from core.health import check_persistent_connections
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """ Test the in-process connection pool """
+
+    def setUp(self):
+        self.made = []
+
+    def connect(self):
+        self.made.append(FakeConnection())
+        return self.made[-1]
+
+    def test_connections_are_reused(self):
+        """ Test a checked in connection is handed out again """
+        pool = ConnectionPool(self.connect, max_size=2)
+
+        first = pool.checkout()
+        pool.checkin(first)
+        second = pool.checkout()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_timeout_when_exhausted(self):
+        """ Test checkout fails when every connection stays in use """
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.01)
+        pool.checkout()
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waits_for_checkin(self):
+        """ Test a waiting checkout gets the connection checked in """
+        pool = ConnectionPool(self.connect, max_size=1, timeout=5)
+        first = pool.checkout()
+        timer = threading.Timer(0.05, pool.checkin, [first])
+        timer.start()
+
+        second = pool.checkout()
+        timer.join()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()['waits'], 1)
+        self.assertGreater(pool.stats()['max_wait_time'], 0)
+
+    def test_broken_connection_discarded(self):
+        """ Test a connection reset reports as broken is not reused """
+        pool = ConnectionPool(
+            self.connect, max_size=1, reset=lambda c: False
+        )
+        pool.checkin(pool.checkout())
+
+        pool.checkout()
+
+        self.assertEqual(len(self.made), 2)
+        self.assertTrue(self.made[0].closed)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_idle_connection_health_checked(self):
+        """ Test a long idle connection failing its check is replaced """
+        pool = ConnectionPool(
+            self.connect, max_size=1, health_check_idle=0,
+            is_usable=lambda c: False
+        )
+        pool.checkin(pool.checkout())
+
+        connection = pool.checkout()
+
+        self.assertIs(connection, self.made[1])
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """ Test a failed connect does not use up the pool """
+        pool = ConnectionPool(self.connect, max_size=1, timeout=0.01)
+        with patch.object(self, 'connect', side_effect=OSError):
+            pool.connect = self.connect
+            with self.assertRaises(OSError):
+                pool.checkout()
+        pool.connect = self.connect
+
+        self.assertIsNotNone(pool.checkout())
+
+
+class PersistentConnectionHealthTests(TestCase):
+    """ Test the request_started connection health check """
+
+    def test_unusable_connection_closed(self):
+        """ Test a dead persistent connection is closed before a request """
+        connection.ensure_connection()
+        with patch.object(connection, 'is_usable', return_value=False), \
+                patch.object(connection, 'close') as close, \
+                patch.object(connection, 'in_atomic_block', False):
+            check_persistent_connections()
+
+        close.assert_called_once_with()
+        self.assertIn(
+            check_persistent_connections,
+            [r[1]() for r in request_started.receivers]
+        )
+
+    def test_readyz_verbose(self):
+        """ Test the verbose readiness answer includes the pool stats """
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin@kosta.com', 'test123'
+        ))
+        res = self.client.get(reverse('readyz'), {'verbose': 1})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['status'], 'ready')
+        self.assertIn('pools', res.json())
@@ -0,0 +1,39 @@
+import datetime
+import json
+from decimal import Decimal
+
+import msgpack
+
+from django.test import SimpleTestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+
+
+class RendererTests(SimpleTestCase):
+    """ Test the API renderers """
+    data = {
+        'id': 1, 'name': 'Crème brûlée ', 'ingredients': [1, 2],
+        'created': datetime.datetime(2020, 1, 2, 3, 4, 5),
+        'price': Decimal('2.50'),
+    }
+
+    def test_fast_json(self):
+        """ Test orjson output decodes like JSONRenderer's """
+        rendered = renderers.FastJSONRenderer().render(self.data)
+
+        self.assertNotIn(' '.encode(), rendered)
+        self.assertEqual(
+            json.loads(rendered),
+            json.loads(JSONRenderer().render(self.data))
+        )
+
+    def test_msgpack_renderer(self):
+        """ Test MessagePack encodes non native types like JSON does """
+        rendered = renderers.MessagePackRenderer().render(self.data)
+
+        decoded = msgpack.unpackb(rendered)
+        self.assertEqual(decoded['created'], '2020-01-02T03:04:05')
+        self.assertEqual(decoded['price'], 2.5)
+        self.assertEqual(decoded['name'], self.data['name'])
@@ -0,0 +1,93 @@
+import json
+from collections import Counter
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe
+from core.synthetic import DatasetGenerator
+
+
+class SeedCommandTests(TestCase):
+    """ Test the synthetic dataset command """
+
+    def _seed(self, **options):
+        defaults = {
+            'users': 3, 'ingredients_per_user': 20, 'recipes_per_user': 10,
+            'ingredients_per_recipe': 4, 'batch_size': 7, 'user_batch': 2,
+            'json': True,
+        }
+        defaults.update(options)
+        out = StringIO()
+        call_command('seed', stdout=out, **defaults)
+        return json.loads(out.getvalue())
+
+    def test_creates_dataset(self):
+        """ Test the reported rows are in the database """
+        counts = self._seed()
+
+        self.assertEqual(counts['users'], 3)
+        self.assertEqual(Ingredient.objects.count(), 60)
+        self.assertEqual(Recipe.objects.count(), counts['recipes'])
+        self.assertEqual(
+            Recipe.ingredients.through.objects.count(), counts['links']
+        )
+        user = get_user_model().objects.get(email='seed-0-0@seed.local')
+        self.assertTrue(user.check_password('seed-password'))
+
+    def test_links_stay_within_user(self):
+        """ Test recipes only use their own user's ingredients """
+        self._seed()
+
+        mismatched = Recipe.ingredients.through.objects.exclude(
+            recipe__user=F('ingredient__user')
+        )
+        self.assertFalse(mismatched.exists())
+
+    def test_reproducible(self):
+        """ Test the same seed draws the same recipes """
+        self._seed(email_prefix='a')
+        self._seed(email_prefix='b', batch_size=1000, user_batch=10)
+
+        def recipes(prefix):
+            return list(Recipe.objects.filter(
+                user__email__startswith=prefix
+            ).order_by('id').values_list('name', 'text'))
+
+        self.assertEqual(recipes('a-'), recipes('b-'))
+
+    def test_existing_users_refused(self):
+        """ Test seeding twice with the same seed and prefix fails """
+        self._seed(users=1)
+
+        with self.assertRaises(CommandError):
+            self._seed(users=1)
+
+
+class DatasetGeneratorTests(TestCase):
+    """ Test the distributions of the generator """
+
+    def test_ingredient_popularity_skewed(self):
+        """ Test staple ingredients are used far more than rare ones """
+        generator = DatasetGenerator(
+            ingredients_per_user=50, ingredients_per_recipe=5, skew=1.1
+        )
+        rng = generator.rng(0)
+        pantry = generator.ingredient_names(rng)
+        used = Counter()
+        for _ in range(500):
+            used.update(generator.recipe(rng, pantry)[2])
+
+        self.assertGreater(used[0], 5 * max(used[49], 1))
+
+    def test_large_pantry(self):
+        """ Test pantries larger than the vocabulary have unique names """
+        generator = DatasetGenerator(ingredients_per_user=250)
+
+        pantry = generator.ingredient_names(generator.rng(0))
+
+        self.assertEqual(len(set(pantry)), 250)
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.health import close_broken_connection
+
+
+HEALTHZ_URL = reverse('healthz')
+READYZ_URL = reverse('readyz')
+
+
+class HealthViewTests(TestCase):
+    """ Test the liveness and readiness endpoints """
+
+    def test_healthz(self):
+        """ Test liveness answers without touching the database """
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'ok')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_readyz(self):
+        """ Test readiness runs a single probe query """
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'ready')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_readyz_database_down(self):
+        """ Test readiness fails when a database does not answer """
+        with patch('core.health.check_database',
+                   side_effect=OperationalError('host 10.0.0.5 down')), \
+                patch('core.health.close_broken_connection') as close, \
+                self.assertLogs('core.health', 'WARNING') as logs:
+            res = self.client.get(READYZ_URL)
+
+        close.assert_called_once()
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json(), {
+            'status': 'unavailable', 'databases': ['default']
+        })
+        self.assertIn('host 10.0.0.5 down', logs.output[0])
+
+    def test_readyz_verbose_needs_staff(self):
+        """ Test anonymous callers get no statistics """
+        res = self.client.get(READYZ_URL, {'verbose': 1})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'ready')
+
+    def test_health_rejects_writes(self):
+        """ Test the endpoints only answer GET and HEAD """
+        self.assertEqual(self.client.post(HEALTHZ_URL).status_code, 405)
+
+
+class CloseBrokenConnectionTests(TestCase):
+    """ Test which probe failures close the connection """
+
+    def test_connection_errors_close(self):
+        """ Test a connection error outside a transaction closes it """
+        with patch.object(connection, 'in_atomic_block', False), \
+                patch.object(connection, 'close') as close:
+            close_broken_connection('default', OperationalError('down'))
+
+        close.assert_called_once_with()
+
+    def test_other_errors_and_transactions_keep_it(self):
+        """ Test other errors, or an open transaction, keep the connection """
+        with patch.object(connection, 'close') as close:
+            close_broken_connection('default', OperationalError('down'))
+            with patch.object(connection, 'in_atomic_block', False):
+                close_broken_connection('default', ValueError('bug'))
+
+        close.assert_not_called()
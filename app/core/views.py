@@ -0,0 +1,50 @@
+"""
+    Health endpoints for orchestrators. They are plain Django views, no
+    authentication, content negotiation or ORM query is involved. Only
+    the statistics of /readyz?verbose need a staff session.
+"""
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from core.compression import compression_stats
+from core.db.pool import pool_stats
+from core.health import database_errors
+
+
+logger = logging.getLogger('core.health')
+
+
+@never_cache
+@require_safe
+def healthz(request):
+    """ Liveness: the process answers requests """
+    return HttpResponse('ok', content_type='text/plain')
+
+
+@never_cache
+@require_safe
+def readyz(request):
+    """
+        Readiness: every database answers SELECT 1. Failing databases are
+        listed by alias, their errors are only logged. With ?verbose staff
+        users also get the connection pool and compression statistics.
+    """
+    errors = database_errors(settings.HEALTHCHECK_DATABASES)
+    for alias, error in errors.items():
+        logger.warning('Database %s is not ready: %s', alias, error)
+    verbose = 'verbose' in request.GET and request.user.is_staff
+    if not errors and not verbose:
+        return HttpResponse('ready', content_type='text/plain')
+
+    data = {
+        'status': 'unavailable' if errors else 'ready',
+        'databases': sorted(errors),
+    }
+    if verbose:
+        data['pools'] = pool_stats()
+        data['compression'] = compression_stats()
+    return JsonResponse(data, status=503 if errors else 200)
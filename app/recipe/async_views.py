@@ -0,0 +1,131 @@
+"""
+    Native async read endpoints for recipes and ingredients.
+
+    Django 3.1 has no async ORM, so a request makes at most one hop to the
+    database thread: authentication with a cached or signed token and
+    response cache hits are answered on the event loop, and only the
+    query and serialization of a cache miss run through sync_to_async.
+    Filtering, pagination and serializers are those of the viewsets.
+
+    Django 3.1 runs thread sensitive code on one thread per process, so by
+    default those hops are serialized. With ASYNC_READ_THREAD_SENSITIVE
+    off they run on the default executor instead, each thread with its own
+    database connection, and concurrent misses query in parallel.
+"""
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from rest_framework import exceptions, mixins, status
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from core.renderers import FastJSONRenderer
+
+from user.authentication import API_AUTHENTICATION_CLASSES, \
+    authenticate_async
+
+from recipe import views
+from recipe.cache import get_cache, response_cache_key
+from recipe.rows import RowListMixin
+
+
+class AsyncReadView:
+    """ Async GET handler for the list or retrieve action of a viewset """
+    renderer = FastJSONRenderer()
+
+    def __init__(self, viewset_class, action):
+        self.viewset_class = viewset_class
+        self.action = action
+        # Pagination links name the path, so the responses of the viewset
+        # cannot be shared
+        self.cache_namespace = 'async:' + viewset_class.cache_namespace
+
+    async def handle(self, request, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return self.error_response(
+                exceptions.MethodNotAllowed(request.method)
+            )
+        try:
+            credentials = await authenticate_async(request)
+        except exceptions.APIException as exc:
+            return self.error_response(exc)
+        if credentials is None:
+            return self.error_response(exceptions.NotAuthenticated())
+
+        request = Request(request)
+        request.user, request.auth = credentials
+
+        cache = get_cache() if self.action == 'list' else None
+        if cache is not None:
+            key = response_cache_key(request, self.cache_namespace)
+            data = cache.get(key)
+            if data is not None:
+                return self.render(data)
+
+        data, response = await sync_to_async(
+            self.get_data,
+            thread_sensitive=settings.ASYNC_READ_THREAD_SENSITIVE
+        )(request, kwargs)
+        if response is not None:
+            return response
+        if cache is not None:
+            cache.set(key, data)
+        return self.render(data)
+
+    def get_data(self, request, kwargs):
+        """ Run the viewset action, return (data, None) or (None, error) """
+        view = self.viewset_class(
+            action=self.action, args=(), kwargs=kwargs, format_kwarg=None,
+            request=request
+        )
+        try:
+            if self.action == 'list':
+                response = RowListMixin.list(view, request)
+            else:
+                response = mixins.RetrieveModelMixin.retrieve(view, request)
+        except Exception as exc:
+            return None, self.error_response(exc, view)
+        finally:
+            if not settings.ASYNC_READ_THREAD_SENSITIVE:
+                # Executor threads never see request_finished
+                close_old_connections()
+        return response.data, None
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data),
+            content_type='application/json',
+            status=status_code
+        )
+
+    def error_response(self, exc, view=None):
+        """ Turn an exception into a response like the viewsets do """
+        response = exception_handler(exc, {'view': view})
+        if response is None:
+            raise exc
+        rendered = self.render(response.data, response.status_code)
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                rendered[header] = value
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            rendered['WWW-Authenticate'] = \
+                API_AUTHENTICATION_CLASSES[0].keyword
+        return rendered
+
+
+def async_read_view(viewset_class, action):
+    """ Return an async view function for a viewset action """
+    handler = AsyncReadView(viewset_class, action)
+
+    # Django only runs coroutine functions natively, not async callables
+    async def view(request, **kwargs):
+        return await handler.handle(request, **kwargs)
+    return view
+
+
+recipe_list = async_read_view(views.RecipeViewSet, 'list')
+recipe_detail = async_read_view(views.RecipeViewSet, 'retrieve')
+ingredient_list = async_read_view(views.IngredientViewSet, 'list')
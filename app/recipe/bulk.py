@@ -0,0 +1,58 @@
+from django.db import connections, router
+
+from core.models import Recipe
+
+
+def bulk_create_returning(model, objs, batch_size=None):
+    """
+        Insert objs with bulk_create and return them with their primary
+        keys set. Backends that cannot return rows from a bulk insert
+        fall back to one INSERT per object.
+    """
+    db = router.db_for_write(model)
+    if connections[db].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(db).bulk_create(
+            objs, batch_size=batch_size
+        )
+    for obj in objs:
+        obj.save(force_insert=True, using=db)
+    return objs
+
+
+def add_recipe_ingredients(recipe, ingredient_ids):
+    """
+        Link the ingredients to recipe with one INSERT, skipping the links
+        that already exist. Sends no m2m_changed signal.
+    """
+    through = Recipe.ingredients.through
+    through.objects.bulk_create([
+        through(recipe_id=recipe.pk, ingredient_id=ingredient_id)
+        for ingredient_id in set(ingredient_ids)
+    ], ignore_conflicts=True)
+
+
+def remove_recipe_ingredients(recipe, ingredient_ids):
+    """
+        Unlink the ingredients from recipe with one DELETE and return how
+        many links were removed. Sends no m2m_changed signal.
+    """
+    return Recipe.ingredients.through.objects.filter(
+        recipe_id=recipe.pk, ingredient_id__in=set(ingredient_ids)
+    ).delete()[0]
+
+
+def set_recipe_ingredients(recipe, ingredient_ids):
+    """
+        Make ingredient_ids the ingredients of recipe by inserting and
+        deleting only the links that differ. Return (added, removed) ids.
+    """
+    current = set(Recipe.ingredients.through.objects.filter(
+        recipe_id=recipe.pk
+    ).values_list('ingredient_id', flat=True))
+    wanted = set(ingredient_ids)
+    added, removed = wanted - current, current - wanted
+    if removed:
+        remove_recipe_ingredients(recipe, removed)
+    if added:
+        add_recipe_ingredients(recipe, added)
+    return added, removed
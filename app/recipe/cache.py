@@ -0,0 +1,122 @@
+"""
+    Per-user response cache for the recipe API.
+
+    Every user has a generation counter that is part of each cache key.
+    Any write to the user's recipes or ingredients bumps the counter, so
+    entries cached before the write can never be read again and simply
+    age out of the cache through its TIMEOUT and MAX_ENTRIES settings.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+from rest_framework.response import Response
+
+
+GENERATION_KEY = 'recipe:generation:{}'
+MODIFIED_KEY = 'recipe:modified:{}'
+RESPONSE_KEY = 'recipe:response:{}:{}:{}:{}'
+
+
+def get_cache():
+    """ Return the API cache, or None when caching is disabled """
+    alias = getattr(settings, 'API_CACHE_ALIAS', None)
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def get_generation(user_id):
+    """ Return the current cache generation of a user """
+    cache = get_cache()
+    if cache is None:
+        return 0
+    key = GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the clock so a counter that was evicted (or a reused
+        # user id) never goes back to a generation used before
+        initial = time.time_ns()
+        if cache.add(key, initial, timeout=None):
+            return initial
+        generation = cache.get(key, initial)
+    return generation
+
+
+def get_last_modified(user_id):
+    """ Return when the user's data last changed as an epoch timestamp """
+    cache = get_cache()
+    if cache is None:
+        return None
+    return cache.get(MODIFIED_KEY.format(user_id))
+
+
+def _incr_generation(user_id):
+    """ Increment the generation counter of a user """
+    cache = get_cache()
+    if cache is None:
+        return
+    key = GENERATION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    cache.set(MODIFIED_KEY.format(user_id), int(time.time()), timeout=None)
+
+
+def bump_generation(user_id):
+    """
+        Invalidate everything cached for a user.
+        The counter is bumped right away and again once the surrounding
+        transaction commits, so a read racing the write cannot cache
+        uncommitted state under the new generation.
+    """
+    _incr_generation(user_id)
+    transaction.on_commit(lambda: _incr_generation(user_id))
+
+
+def invalidate_rolled_back(user_id):
+    """
+        Invalidate what was cached for a user inside a transaction that is
+        rolled back, the commit time bump of bump_generation never comes
+    """
+    _incr_generation(user_id)
+
+
+def query_digest(request):
+    """ Return a digest of the request's normalised query parameters """
+    params = sorted(request.query_params.lists())
+    return hashlib.md5(urlencode(params, doseq=True).encode()).hexdigest()
+
+
+def response_cache_key(request, namespace):
+    """ Return the cache key of a response for the requesting user """
+    user_id = request.user.pk
+    return RESPONSE_KEY.format(
+        user_id, get_generation(user_id), namespace, query_digest(request)
+    )
+
+
+class CachedListMixin:
+    """ Serve the list action from the per-user response cache """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        """ Return the cached list response or build and cache it """
+        cache = get_cache()
+        if cache is None:
+            return super().list(request, *args, **kwargs)
+
+        key = response_cache_key(request, self.cache_namespace)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+        return response
@@ -0,0 +1,139 @@
+"""
+    Conditional GET support for the recipe API.
+
+    List validators come from the per-user cache generation and detail
+    validators from the object's updated_at column, so a matching
+    If-None-Match or If-Modified-Since is answered with 304 before any
+    serialization, and for lists without touching the database at all.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from recipe.cache import get_generation, get_last_modified, query_digest
+
+
+def make_etag(*parts):
+    """ Return a strong ETag built from the given parts """
+    digest = hashlib.md5(':'.join(str(p) for p in parts).encode())
+    return '"%s"' % digest.hexdigest()
+
+
+class ConditionalGetMixin:
+    """ Shared helpers to emit ETag/Last-Modified and honour them """
+    etag_namespace = None
+
+    def get_representation_key(self, request):
+        """ Return what besides the data changes the response body """
+        return '%s:%s' % (
+            query_digest(request), request.accepted_renderer.format
+        )
+
+    def get_list_validators(self, request):
+        """ Return the ETag and Last-Modified of the user's collection """
+        generation = get_generation(request.user.pk)
+        if not generation:
+            # Without the cache there is no collection version
+            return None, None
+        etag = make_etag(
+            request.user.pk, self.etag_namespace, generation,
+            self.get_representation_key(request)
+        )
+        return etag, get_last_modified(request.user.pk)
+
+    def _object_validators(self, request, lookup, updated_at):
+        """ Return the ETag and Last-Modified for an object version """
+        if updated_at is None:
+            return None, None
+        etag = make_etag(
+            self.etag_namespace, lookup, updated_at.isoformat(),
+            self.get_representation_key(request)
+        )
+        return etag, int(updated_at.timestamp())
+
+    def get_object_validators(self, request):
+        """
+            Return the validators of the requested object by reading only
+            its updated_at column
+        """
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            updated_at = self.get_queryset().prefetch_related(None).filter(
+                **{self.lookup_field: lookup}
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            # Let the regular handler answer 404 for malformed lookups
+            return None, None
+        return self._object_validators(request, lookup, updated_at)
+
+    def is_conditional(self, request):
+        """ Return whether the request carries any validator """
+        return (
+            'HTTP_IF_NONE_MATCH' in request.META or
+            'HTTP_IF_MODIFIED_SINCE' in request.META
+        )
+
+    def not_modified(self, request, etag, last_modified):
+        """ Return a 304 response if the validators match, else None """
+        if etag is None:
+            return None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+        return response
+
+    def set_validators(self, response, etag, last_modified):
+        """ Add the validator headers to a 200 or 304 response """
+        if etag is None or response.status_code not in (200, 304):
+            return
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """ Answer conditional list requests from the collection version """
+
+    def list(self, request, *args, **kwargs):
+        """ List with conditional GET support """
+        etag, last_modified = self.get_list_validators(request)
+        response = self.not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            self.set_validators(response, etag, last_modified)
+        return response
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """ Answer conditional retrieve requests from updated_at """
+
+    def get_object(self):
+        """ Keep the retrieved object to build its validators """
+        obj = super().get_object()
+        self._validated_object = obj
+        return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+            Retrieve with conditional GET support. The updated_at lookup
+            only runs for requests that carry validators, unconditional
+            requests take their validators from the loaded object.
+        """
+        if self.is_conditional(request):
+            response = self.not_modified(
+                request, *self.get_object_validators(request)
+            )
+            if response is not None:
+                return response
+
+        response = super().retrieve(request, *args, **kwargs)
+        obj = getattr(self, '_validated_object', None)
+        if obj is not None:
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            self.set_validators(response, *self._object_validators(
+                request, lookup, obj.updated_at
+            ))
+        return response
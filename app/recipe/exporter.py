@@ -0,0 +1,74 @@
+"""
+    Streaming export of a user's recipe library.
+
+    Recipes are read through a server-side cursor in chunks and the
+    ingredients of each chunk are fetched with one query, so memory use
+    is bounded by the chunk size and the first bytes go out as soon as
+    the first chunk has been read.
+"""
+import csv
+import json
+
+from core.models import Recipe
+
+from recipe.rows import attach_ingredients
+
+
+class Echo:
+    """ File-like object that returns what is written to it """
+
+    def write(self, value):
+        return value
+
+
+class RecipeExporter:
+    """ Serialize all recipes of a user as JSON Lines or CSV """
+    formats = {
+        'jsonl': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+    csv_header = ('id', 'name', 'text', 'ingredients')
+
+    def __init__(self, user, chunk_size=2000):
+        self.user = user
+        self.chunk_size = chunk_size
+
+    def iter_chunks(self):
+        """ Yield lists of recipe dicts with their nested ingredients """
+        rows = Recipe.objects.filter(user=self.user).order_by('id').values(
+            'id', 'name', 'text'
+        ).iterator(chunk_size=self.chunk_size)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                attach_ingredients(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            attach_ingredients(chunk)
+            yield chunk
+
+    def iter_jsonl(self):
+        """ Yield the library as JSON Lines, one chunk at a time """
+        for chunk in self.iter_chunks():
+            yield ''.join(json.dumps(row) + '\n' for row in chunk)
+
+    def iter_csv(self):
+        """ Yield the library as CSV with ingredient names joined by ; """
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.csv_header)
+        for chunk in self.iter_chunks():
+            yield ''.join(
+                writer.writerow((
+                    row['id'], row['name'], row['text'],
+                    ';'.join(i['name'] for i in row['ingredients'])
+                ))
+                for row in chunk
+            )
+
+    def stream(self, export_format):
+        """ Return the generator for the given format """
+        if export_format == 'csv':
+            return self.iter_csv()
+        return self.iter_jsonl()
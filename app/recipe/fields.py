@@ -0,0 +1,63 @@
+from django.utils.encoding import smart_str
+
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+
+class UserScopedManyRelatedField(ManyRelatedField):
+    """
+        List of primary keys validated with a single id__in query. Every
+        invalid id is reported at once and the fetched objects are the
+        validated value, so saving the relation does not look them up again.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = []
+        errors = []
+        for item in data:
+            if isinstance(item, bool):
+                errors.append(child.error_messages['incorrect_type'].format(
+                    data_type=type(item).__name__))
+                continue
+            try:
+                pks.append(int(smart_str(item)))
+            except (TypeError, ValueError):
+                errors.append(child.error_messages['incorrect_type'].format(
+                    data_type=type(item).__name__))
+
+        found = child.get_queryset().in_bulk(set(pks)) if pks else {}
+        errors.extend(
+            child.error_messages['does_not_exist'].format(pk_value=pk)
+            for pk in pks if pk not in found
+        )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [found[pk] for pk in pks]
+
+
+class UserScopedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+        Primary key relation limited to the objects of the requesting
+        user, with many=True validating the whole list in one query
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return UserScopedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset
+        return queryset.filter(user=request.user)
@@ -0,0 +1,107 @@
+"""
+    Sparse fieldsets and on-demand expansion.
+
+    ?fields=id,name limits the list and retrieve responses to those fields
+    and ?expand=ingredients nests the related objects in place of their
+    ids. The query follows: only the selected columns are loaded and
+    relations that are not returned are not prefetched.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+def parse_names(params, param, allowed):
+    """ Return the comma separated names of a parameter, or None """
+    value = params.get(param)
+    if value is None:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        return None
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValidationError({param: [
+            'Unknown field(s): {}. Expected any of: {}.'.format(
+                ', '.join(unknown), ', '.join(allowed))
+        ]})
+    return names
+
+
+class SparseFieldsetSerializerMixin:
+    """
+        Keep only the fields named in the 'fieldset' context entry and nest
+        those in 'expand' with their serializer from Meta.expandable_fields
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fieldset')
+        if selected is not None:
+            for name in list(fields):
+                if name not in selected:
+                    del fields[name]
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self.context.get('expand', ()):
+            if name in fields:
+                fields[name] = expandable[name](many=True, read_only=True)
+        return fields
+
+
+class SparseFieldsetMixin:
+    """
+        Read ?fields= and ?expand= for the fieldset_actions, see the module
+        docstring. Columns in fieldset_columns are always loaded, and the
+        rows of RowListMixin are narrowed and expanded the same way through
+        row_expansions.
+    """
+    fieldset_actions = ('list', 'retrieve')
+    fieldset_columns = ('id',)
+    row_expansions = {}
+
+    def get_fieldset(self):
+        """ Return the selected fields, or None for all, and the expanded """
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = (None, ())
+            if self.action in self.fieldset_actions:
+                meta = self.get_serializer_class().Meta
+                params = self.request.query_params
+                self._fieldset = (
+                    parse_names(params, 'fields', meta.fields),
+                    parse_names(params, 'expand', tuple(
+                        getattr(meta, 'expandable_fields', {})
+                    )) or ()
+                )
+        return self._fieldset
+
+    def is_field_selected(self, name):
+        """ Return whether the response includes the field name """
+        selected = self.get_fieldset()[0]
+        return selected is None or name in selected
+
+    def select_fieldset(self, queryset):
+        """ Defer the model columns the response does not include """
+        selected = self.get_fieldset()[0]
+        if selected is None:
+            return queryset
+        columns = [
+            field.name for field in queryset.model._meta.concrete_fields
+            if field.name in selected or field.name in self.fieldset_columns
+        ]
+        return queryset.only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'], context['expand'] = self.get_fieldset()
+        return context
+
+    def get_row_fields(self):
+        fields = super().get_row_fields()
+        selected = self.get_fieldset()[0]
+        if fields is None or selected is None:
+            return fields
+        return tuple(name for name in fields if name in selected)
+
+    def get_row_relations(self):
+        relations = dict(super().get_row_relations())
+        for name in self.get_fieldset()[1]:
+            relations[name] = self.row_expansions[name]
+        return relations
@@ -0,0 +1,129 @@
+"""
+    Streaming import of recipes from newline-delimited JSON.
+
+    Each line is an object such as
+        {"name": "Soup", "text": "...", "ingredients": ["Leek", "Salt"]}
+    Lines are consumed lazily and written in batches, so memory use
+    depends on the batch size and not on the size of the input.
+"""
+import json
+
+from django.db import transaction
+
+from core.models import Ingredient, Recipe
+
+from recipe.bulk import bulk_create_returning
+from recipe.cache import bump_generation
+
+
+class RecipeImporter:
+    """ Import recipes for one user from an iterable of NDJSON lines """
+    max_errors = 100
+    max_name_length = 255
+
+    def __init__(self, user, batch_size=500):
+        self.user = user
+        self.batch_size = batch_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def import_lines(self, lines):
+        """ Import every line and return a summary of the run """
+        batch = []
+        for line_number, line in enumerate(lines, 1):
+            try:
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                if not line.strip():
+                    continue
+                batch.append(self.parse_line(line))
+            except ValueError as exc:
+                self._add_error(line_number, exc)
+                continue
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        return self.summary()
+
+    def parse_line(self, line):
+        """ Validate a line and return (name, text, ingredient names) """
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError('Invalid JSON: {}'.format(exc.msg))
+        if not isinstance(item, dict):
+            raise ValueError('Expected a JSON object')
+
+        name = item.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError('name must be a non-empty string')
+        name = name.strip()
+        if len(name) > self.max_name_length:
+            raise ValueError('name is longer than {} characters'.format(
+                self.max_name_length))
+        text = item.get('text', '')
+        if not isinstance(text, str):
+            raise ValueError('text must be a string')
+        ingredients = item.get('ingredients', [])
+        if not isinstance(ingredients, list) or \
+                not all(isinstance(i, str) for i in ingredients):
+            raise ValueError('ingredients must be a list of names')
+        ingredients = set(i.strip() for i in ingredients)
+        if not all(0 < len(i) <= self.max_name_length for i in ingredients):
+            raise ValueError('ingredients must be a list of names')
+
+        return name, text, sorted(ingredients)
+
+    @transaction.atomic
+    def write_batch(self, batch):
+        """ Write a batch of parsed recipes and their ingredients """
+        ingredient_ids = self._resolve_ingredients(
+            set(name for _, _, names in batch for name in names)
+        )
+        recipes = bulk_create_returning(Recipe, [
+            Recipe(user=self.user, name=name, text=text)
+            for name, text, _ in batch
+        ])
+        through = Recipe.ingredients.through
+        through.objects.bulk_create([
+            through(recipe_id=recipe.pk, ingredient_id=ingredient_ids[name])
+            for recipe, (_, _, names) in zip(recipes, batch)
+            for name in names
+        ], batch_size=self.batch_size)
+        self.created += len(recipes)
+        # bulk_create sends no signals, invalidate the cache explicitly
+        bump_generation(self.user.pk)
+
+    def _resolve_ingredients(self, names):
+        """ Map ingredient names to ids, creating the missing ones """
+        ingredient_ids = {}
+        existing = Ingredient.objects.filter(
+            user=self.user, name__in=names
+        ).order_by('id').values_list('name', 'id')
+        for name, pk in existing:
+            ingredient_ids.setdefault(name, pk)
+
+        missing = [
+            Ingredient(user=self.user, name=name)
+            for name in sorted(names) if name not in ingredient_ids
+        ]
+        for ingredient in bulk_create_returning(Ingredient, missing):
+            ingredient_ids[ingredient.name] = ingredient.pk
+        return ingredient_ids
+
+    def _add_error(self, line_number, exc):
+        """ Count a rejected line, keeping at most max_errors messages """
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_number, 'error': str(exc)})
+
+    def summary(self):
+        """ Return the result of the import """
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
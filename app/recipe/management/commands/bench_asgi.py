@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import summarize
+
+
+# (name, sync URL name, async URL name)
+ENDPOINTS = (
+    ('recipe list', 'recipe:recipe-list', 'recipe:async-recipe-list'),
+    ('ingredient list', 'recipe:ingredient-list',
+     'recipe:async-ingredient-list'),
+)
+
+
+class Command(BaseCommand):
+    """ Django command comparing the WSGI and async read endpoints """
+    help = 'Compare requests/sec and latency of the recipe read endpoints ' \
+           'served through WSGI and the native async views under ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email', help='User to send the requests as, '
+                            'defaults to the most recently created user'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests per endpoint and server'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=20,
+            help='Requests in flight at once'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Disable the response cache so every request queries'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.all()
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.order_by('-id').first()
+        if user is None:
+            raise CommandError('No user to send the requests as')
+        token = Token.objects.get_or_create(user=user)[0]
+        header = 'Token ' + token.key
+
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if options['no_cache']:
+            overrides['API_CACHE_ALIAS'] = None
+
+        results = []
+        with override_settings(**overrides):
+            for name, sync_name, async_name in ENDPOINTS:
+                results.append(dict(
+                    endpoint=name, server='wsgi', **self.run_wsgi(
+                        reverse(sync_name), {'HTTP_AUTHORIZATION': header},
+                        options['requests'], options['concurrency'])
+                ))
+                results.append(dict(
+                    endpoint=name, server='asgi', **self.run_asgi(
+                        # AsyncClient takes raw header names
+                        reverse(async_name), {'AUTHORIZATION': header},
+                        options['requests'], options['concurrency'])
+                ))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                '{endpoint:<16} {server}  {requests_per_sec:>9} req/s  '
+                'p50 {p50_ms:>8} ms  p99 {p99_ms:>8} ms'.format(**result)
+            )
+
+    def run_wsgi(self, path, headers, requests, concurrency):
+        """ Send the requests from a thread per concurrent client """
+        def request(_):
+            start = time.perf_counter()
+            response = Client().get(path, **headers)
+            self._check(path, response)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            latencies = [request(i) for i in range(requests)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(request, range(requests)))
+        return summarize(latencies, time.perf_counter() - start)
+
+    def run_asgi(self, path, headers, requests, concurrency):
+        """ Send the requests as coroutines on one event loop """
+        client = AsyncClient()
+        latencies = []
+
+        async def request(semaphore):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, **headers)
+                self._check(path, response)
+                latencies.append(time.perf_counter() - start)
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*[
+                request(semaphore) for _ in range(requests)
+            ])
+
+        start = time.perf_counter()
+        # Thread sensitive code then runs on this thread, as it would on
+        # the single sync thread of an ASGI server
+        async_to_sync(run)()
+        return summarize(latencies, time.perf_counter() - start)
+
+    def _check(self, path, response):
+        if response.status_code != 200:
+            raise CommandError('{} answered {}'.format(
+                path, response.status_code))
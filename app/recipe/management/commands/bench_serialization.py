@@ -0,0 +1,112 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from core.synthetic import DatasetGenerator, seed_dataset
+
+from recipe.rows import attach_ingredient_ids
+from recipe.serializers import RecipeSerializer
+
+
+EMAIL_PREFIX = 'bench-serialization'
+
+
+class Command(BaseCommand):
+    """ Django command timing the recipe list serialization paths """
+    help = 'Time serializing and rendering a recipe list through the ' \
+           'serializers and through values() rows, per 1,000 recipes. ' \
+           'The data is created in a transaction that is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=1000, help='Recipes to list'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=8,
+            help='Ingredients per recipe'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Runs per measurement, the fastest one is reported'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.create_user(options['recipes'], options['ingredients'])
+            results = self.measure(user, options['recipes'], options['repeat'])
+            transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                '{step:<24} {ms_per_1000:>9} ms/1000  {speedup:>6}x'.format(
+                    **result)
+            )
+
+    def create_user(self, recipes, ingredients):
+        """ Create one synthetic user with exactly recipes recipes """
+        generator = DatasetGenerator(
+            ingredients_per_user=max(50, ingredients * 4),
+            recipes_per_user=recipes,
+            ingredients_per_recipe=ingredients,
+            spread=0
+        )
+        seed_dataset(generator, 1, email_prefix=EMAIL_PREFIX)
+        return get_user_model().objects.get(
+            email__startswith=EMAIL_PREFIX + '-')
+
+    def measure(self, user, recipes, repeat):
+        """ Return the best time of each step and its speedup """
+        queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+        def serializer():
+            return RecipeSerializer(
+                queryset.prefetch_related('ingredients'), many=True
+            ).data
+
+        def rows():
+            listed = list(queryset.values('id', 'name', 'text'))
+            attach_ingredient_ids(listed)
+            return listed
+
+        data = rows()
+        steps = (
+            # (step, function, step it is compared with)
+            ('serializer', serializer, None),
+            ('values rows', rows, 'serializer'),
+            ('render json', lambda: JSONRenderer().render(data), None),
+            ('render fast json',
+             lambda: FastJSONRenderer().render(data), 'render json'),
+            ('render msgpack',
+             lambda: MessagePackRenderer().render(data), 'render json'),
+        )
+        timings = {}
+        results = []
+        for step, function, baseline in steps:
+            best = min(_time(function) for _ in range(repeat))
+            timings[step] = best
+            results.append({
+                'step': step,
+                'ms_per_1000': round(best / recipes * 1000 * 1000, 3),
+                'speedup': round(timings[baseline] / best, 2)
+                if baseline else 1.0,
+            })
+        return results
+
+
+def _time(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
@@ -0,0 +1,150 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Ingredient, Recipe
+
+
+# Plan lines reading a whole table instead of going through an index
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+
+# Tables that must always be reached through an index
+WATCHED_TABLES = ('core_recipe', 'core_ingredient', 'core_recipe_ingredients')
+
+
+class Command(BaseCommand):
+    """ Django command to EXPLAIN the queries of the recipe endpoints """
+    help = 'Run EXPLAIN on every query of the recipe and ingredient ' \
+           'endpoints and report sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email', help='User to run the endpoints as, '
+                            'defaults to the most recently created user'
+        )
+        parser.add_argument(
+            '--fail-on-seq-scan', action='store_true',
+            help='Exit with an error when a sequential scan is found'
+        )
+        parser.add_argument(
+            '--plans', action='store_true', help='Print the full plans'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError('EXPLAIN is not supported on {}'.format(vendor))
+
+        user = self._get_user(options['email'])
+        scans = []
+        for name, path, params in self.get_endpoints(user):
+            queries = self._capture(user, path, params)
+            self.stdout.write('{} ({} queries)'.format(name, len(queries)))
+            for sql in queries:
+                plan = self.explain(sql)
+                found = self.find_seq_scans(plan)
+                if options['plans']:
+                    self.stdout.write('  ' + sql)
+                    for line in plan:
+                        self.stdout.write('    ' + line)
+                for table in found:
+                    self.stdout.write(self.style.WARNING(
+                        '  sequential scan on {}: {}'.format(table, sql)
+                    ))
+                    scans.append((name, table))
+
+        if scans and options['fail_on_seq_scan']:
+            raise CommandError('{} sequential scan(s) found'.format(
+                len(scans)))
+        if not scans:
+            self.stdout.write(self.style.SUCCESS('No sequential scans'))
+
+    def _get_user(self, email):
+        """ Return the user to explain the endpoints for """
+        users = get_user_model().objects.all()
+        if email:
+            users = users.filter(email=email)
+        user = users.order_by('-id').first()
+        if user is None:
+            raise CommandError('No user to run the endpoints as')
+        return user
+
+    def get_endpoints(self, user):
+        """ Return (name, path, query params) of each endpoint to check """
+        recipes = reverse('recipe:recipe-list')
+        ingredients = reverse('recipe:ingredient-list')
+        ingredient_ids = ','.join(str(pk) for pk in Ingredient.objects.filter(
+            user=user).order_by('id').values_list('id', flat=True)[:3]) or '0'
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+
+        endpoints = [
+            ('recipe list', recipes, {}),
+            ('recipe list page', recipes, {'page_size': 50}),
+            ('recipe filter', recipes, {'ingredients': ingredient_ids}),
+            ('recipe coverage', recipes, {
+                'ingredients': ingredient_ids, 'match': 'coverage'}),
+            ('recipe search', recipes, {'search': 'soup'}),
+            ('ingredient list', ingredients, {}),
+            ('ingredient list page', ingredients, {'page_size': 50}),
+            ('ingredient assigned', ingredients, {'assigned_only': 1}),
+        ]
+        if recipe is not None:
+            endpoints.append((
+                'recipe detail',
+                reverse('recipe:recipe-detail', args=[recipe.id]), {}
+            ))
+        return endpoints
+
+    def _capture(self, user, path, params):
+        """ Call an endpoint and return the SELECTs it ran """
+        request = APIRequestFactory().get(path, params)
+        force_authenticate(request, user=user)
+        match = resolve(path)
+        # Bypass the response cache so every query really runs, the
+        # request is built in-process so its host needs no checking
+        with override_settings(API_CACHE_ALIAS=None, ALLOWED_HOSTS=['*']), \
+                CaptureQueriesContext(connection) as ctx:
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        if response.status_code != 200:
+            raise CommandError('{} answered {}'.format(
+                path, response.status_code))
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].lstrip().upper().startswith('SELECT')
+        ]
+
+    def explain(self, sql):
+        """ Return the plan of a query as a list of lines """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny tables are always scanned, so only flag scans the
+                # planner picks when it is told to avoid them
+                cursor.execute('SET enable_seqscan = off')
+                try:
+                    cursor.execute('EXPLAIN ' + sql)
+                    return [row[0] for row in cursor.fetchall()]
+                finally:
+                    cursor.execute('RESET enable_seqscan')
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def find_seq_scans(self, plan, vendor=None):
+        """ Return the watched tables the plan scans sequentially """
+        pattern = SEQ_SCAN_PATTERNS[vendor or connection.vendor]
+        found = []
+        for line in plan:
+            match = pattern.search(line.strip())
+            if match and match.group(1) in WATCHED_TABLES:
+                found.append(match.group(1))
+        return found
@@ -0,0 +1,47 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.importer import RecipeImporter
+
+
+class Command(BaseCommand):
+    """ Django command to import recipes from a NDJSON file """
+    help = 'Import newline-delimited JSON recipes for a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='NDJSON file to import, or - to read stdin'
+        )
+        parser.add_argument(
+            '--email', required=True, help='Owner of the imported recipes'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Recipes written per batch'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('No user with email {}'.format(
+                options['email']))
+
+        importer = RecipeImporter(user, batch_size=options['batch_size'])
+        if options['path'] == '-':
+            summary = importer.import_lines(sys.stdin)
+        else:
+            try:
+                with open(options['path'], encoding='utf-8') as lines:
+                    summary = importer.import_lines(lines)
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stderr.write('line {line}: {error}'.format(**error))
+        self.stdout.write(json.dumps(
+            {'created': summary['created'], 'failed': summary['failed']}
+        ))
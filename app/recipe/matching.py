@@ -0,0 +1,61 @@
+"""
+    "What can I cook" matching of recipes against a set of ingredients.
+
+    Every mode is a single aggregate query: the recipe's ingredient count
+    and the number of those ingredients found in the pantry are counted
+    over one join of the Recipe.ingredients table, and the filtering and
+    ranking happen in SQL.
+"""
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast, NullIf
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_COVERAGE = 'coverage'
+MATCH_MODES = (MATCH_ANY, MATCH_ALL, MATCH_COVERAGE)
+
+
+def annotate_coverage(queryset, ingredient_ids):
+    """ Annotate how many of each recipe's ingredients are in the set """
+    return queryset.annotate(
+        total_ingredients=Count('ingredients', distinct=True),
+        matched_ingredients=Count(
+            'ingredients',
+            filter=Q(ingredients__in=ingredient_ids),
+            distinct=True
+        ),
+    ).annotate(
+        missing_ingredients=F('total_ingredients') -
+        F('matched_ingredients'),
+        coverage=Cast('matched_ingredients', FloatField()) /
+        NullIf(Cast('total_ingredients', FloatField()), 0.0),
+    )
+
+
+def match_recipes(queryset, ingredient_ids, mode=MATCH_ANY,
+                  max_missing=None):
+    """
+        Filter and rank recipes by the ingredients in ingredient_ids.
+          any       recipes using at least one of the ingredients
+          all       recipes using every one of the ingredients
+          coverage  recipes ranked by the share of their ingredients in
+                    the set, optionally missing at most max_missing
+    """
+    ingredient_ids = set(ingredient_ids)
+    if mode == MATCH_ANY:
+        return queryset.filter(ingredients__id__in=ingredient_ids).distinct()
+
+    queryset = annotate_coverage(queryset, ingredient_ids)
+    if mode == MATCH_ALL:
+        return queryset.filter(matched_ingredients=len(ingredient_ids))
+
+    if max_missing is not None:
+        queryset = queryset.filter(missing_ingredients__lte=max_missing)
+    else:
+        queryset = queryset.filter(matched_ingredients__gt=0)
+    return queryset.order_by(
+        F('coverage').desc(nulls_last=True),
+        'missing_ingredients',
+        '-id'
+    )
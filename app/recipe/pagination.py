@@ -0,0 +1,130 @@
+import json
+
+from django.db.models import Q
+
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+
+
+class RecipeCursorPagination(pagination.CursorPagination):
+    """ Keyset pagination over recipes in primary key order """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('id',)
+
+
+class KeysetCursorPagination(pagination.CursorPagination):
+    """
+        Cursor pagination positioned on every field of the ordering, which
+        must end with a unique one. The base class only filters on the
+        first field and skips the rows sharing its value with an offset,
+        so long runs of equal values were scanned again on every page.
+    """
+
+    def decode_cursor(self, request):
+        """ Keep the position aside, paginate_queryset filters on it """
+        cursor = super().decode_cursor(request)
+        self.keyset_position = None
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            values = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or \
+                len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        self.keyset_position = cursor.position
+        self.keyset_values = values
+        return cursor._replace(position=None)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        if self.keyset_position is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor.reverse))
+        page = super().paginate_queryset(queryset, request, view)
+        if page is None or self.keyset_position is None:
+            return page
+
+        # The base class saw no position, the page it came from is behind
+        if cursor.reverse:
+            self.has_next = True
+            self.next_position = self.keyset_position
+        else:
+            self.has_previous = True
+            self.previous_position = self.keyset_position
+        if self.template is not None:
+            self.display_page_controls = True
+        return page
+
+    def keyset_filter(self, reverse):
+        """ Return the rows after the position, or before it if reverse """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, self.keyset_values):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') != reverse else '__gt'
+            condition |= equal & Q(**{name + lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict)
+            else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        return json.dumps(values, default=str)
+
+
+class IngredientCursorPagination(KeysetCursorPagination):
+    """ Keyset pagination over ingredients in reverse name order """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('-name', 'id')
+
+
+class OffsetPagination(pagination.LimitOffsetPagination):
+    """ Limit/offset pagination kept for admin-style random access """
+    max_limit = 1000
+
+
+class OptInPaginationMixin:
+    """
+        Paginate list responses only when the client asks for it.
+        Sending `cursor` or `page_size` selects keyset pagination, which
+        stays fast however deep the client pages, while `limit`/`offset`
+        selects offset pagination. Without any of them the full list is
+        returned as before. A cursor pages in the fixed order of its
+        pagination class, so lists ranked by a query parameter (see
+        get_ranking_param) refuse cursor parameters and page by offset.
+    """
+    cursor_pagination_class = None
+    offset_pagination_class = OffsetPagination
+
+    cursor_query_params = ('cursor', 'page_size')
+    offset_query_params = ('limit', 'offset')
+
+    @property
+    def paginator(self):
+        """ Return the paginator requested by the query parameters """
+        if not hasattr(self, '_paginator'):
+            self._paginator = None
+            params = self.request.query_params
+            if any(p in params for p in self.cursor_query_params):
+                ranking_param = self.get_ranking_param()
+                if ranking_param is not None:
+                    raise ValidationError({ranking_param: [
+                        'Ranked results are paginated with limit and offset.'
+                    ]})
+                self._paginator = self.cursor_pagination_class()
+            elif any(p in params for p in self.offset_query_params):
+                self._paginator = self.offset_pagination_class()
+        return self._paginator
+
+    def get_ranking_param(self):
+        """ Return the query parameter ranking the list, if any """
+        return None
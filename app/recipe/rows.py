@@ -0,0 +1,94 @@
+"""
+    Read-only list serialization straight from values() rows.
+
+    Serializing a list through the serializers builds a model instance
+    per object, a related manager per recipe and a field call per value,
+    which dominates the time of large lists. Lists only read, so they are
+    built from values() rows instead and the ingredient ids of all the
+    listed recipes are fetched with one query on the Recipe.ingredients
+    table and grouped per recipe in Python. The output is the same as the
+    serializer's, key order included.
+"""
+from django.conf import settings
+
+from rest_framework.response import Response
+
+from core.models import Recipe
+
+
+def attach_ingredients(rows):
+    """ Set 'ingredients' of each recipe row to its ingredient objects """
+    ingredients = {row['id']: [] for row in rows}
+    if ingredients:
+        links = Recipe.ingredients.through.objects.filter(
+            recipe_id__in=ingredients
+        ).order_by('recipe_id', 'ingredient_id').values_list(
+            'recipe_id', 'ingredient_id', 'ingredient__name'
+        )
+        for recipe_id, ingredient_id, name in links:
+            ingredients[recipe_id].append({'id': ingredient_id, 'name': name})
+    for row in rows:
+        row['ingredients'] = ingredients[row['id']]
+
+
+def attach_ingredient_ids(rows):
+    """ Set 'ingredients' of each recipe row to its ingredient ids """
+    ingredients = {row['id']: [] for row in rows}
+    if ingredients:
+        links = Recipe.ingredients.through.objects.filter(
+            recipe_id__in=ingredients
+        ).order_by('recipe_id', 'ingredient_id').values_list(
+            'recipe_id', 'ingredient_id'
+        )
+        for recipe_id, ingredient_id in links:
+            ingredients[recipe_id].append(ingredient_id)
+    for row in rows:
+        row['ingredients'] = ingredients[row['id']]
+
+
+class RowListMixin:
+    """
+        Serve the list action from values() rows when the serializer is one
+        of row_serializer_classes. Their Meta.fields must be columns or
+        annotations of the queryset, or relations in row_relations, which
+        map a field name to a function setting it on every row.
+    """
+    row_serializer_classes = ()
+    row_relations = {}
+
+    def get_row_fields(self):
+        """ Return the fields of the rows, or None to use the serializer """
+        if not getattr(settings, 'FAST_LIST_SERIALIZATION', True):
+            return None
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in self.row_serializer_classes:
+            return None
+        return serializer_class.Meta.fields
+
+    def get_row_relations(self):
+        """ Return {field name: function setting it on every row} """
+        return self.row_relations
+
+    def list(self, request, *args, **kwargs):
+        """ List from values() rows, see the module docstring """
+        fields = self.get_row_fields()
+        if fields is None:
+            return super().list(request, *args, **kwargs)
+
+        relations = self.get_row_relations()
+        queryset = self.filter_queryset(self.get_queryset())
+        # The id is read even when not listed, relations and the cursor
+        # pagination need it
+        queryset = queryset.prefetch_related(None).values('id', *[
+            name for name in fields
+            if name != 'id' and name not in relations
+        ])
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        for name, attach in relations.items():
+            if name in fields:
+                attach(rows)
+        data = [{name: row[name] for name in fields} for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
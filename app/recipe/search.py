@@ -0,0 +1,160 @@
+"""
+    Full-text search over recipe names and texts.
+
+    On PostgreSQL the search runs against the GIN expression index created
+    in core/migrations/0007_recipe_search_index.py, so the cost depends on
+    the number of matches. Other databases use an in-process inverted
+    index per user, rebuilt only when the user's cache generation moves.
+"""
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.db import connection
+from django.db.models import Case, IntegerField, When
+from django.db.models.expressions import RawSQL
+
+from core.models import Recipe
+
+from recipe.cache import get_cache, get_generation
+
+
+SEARCH_CONFIG = 'english'
+
+# Must stay the same expression as the one indexed by the migration
+SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('english'::regconfig, "
+    "COALESCE(\"core_recipe\".\"name\", '') || ' ' || "
+    "COALESCE(\"core_recipe\".\"text\", ''))"
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(value):
+    """ Split a string into lower case word tokens """
+    return TOKEN_RE.findall(value.lower())
+
+
+class InvertedIndex:
+    """
+        Map each token to the recipes containing it with a score.
+        Matches in the name weigh more than matches in the text, the same
+        way the PostgreSQL ranking uses weights A and B.
+    """
+    name_weight = 1.0
+    text_weight = 0.4
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        for recipe_id, name, text in documents:
+            self._add(recipe_id, name, self.name_weight)
+            self._add(recipe_id, text, self.text_weight)
+
+    def _add(self, recipe_id, value, weight):
+        """ Add the tokens of one field of a recipe """
+        for token in tokenize(value or ''):
+            scores = self.postings[token]
+            scores[recipe_id] = scores.get(recipe_id, 0) + weight
+
+    def search(self, query):
+        """ Return the ids matching every query token, best first """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        postings = sorted(
+            (self.postings.get(token, {}) for token in tokens), key=len
+        )
+        matches = set(postings[0])
+        for scores in postings[1:]:
+            matches &= scores.keys()
+        ranked = (
+            (sum(scores[recipe_id] for scores in postings), recipe_id)
+            for recipe_id in matches
+        )
+        return [recipe_id for _, recipe_id in sorted(
+            ranked, key=lambda item: (-item[0], -item[1])
+        )]
+
+
+class IndexCache:
+    """ Small LRU of per-user inverted indexes tagged with a generation """
+
+    def __init__(self, max_users=128):
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """ Return the user's index, rebuilding it if it is stale """
+        if get_cache() is None:
+            # Without generations there is no way to tell a stale index
+            return self._build(user_id)
+
+        generation = get_generation(user_id)
+        with self._lock:
+            entry = self._indexes.get(user_id)
+            if entry is not None and entry[0] == generation:
+                self._indexes.move_to_end(user_id)
+                return entry[1]
+
+        index = self._build(user_id)
+        with self._lock:
+            self._indexes[user_id] = (generation, index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        """ Drop every cached index """
+        with self._lock:
+            self._indexes.clear()
+
+    def _build(self, user_id):
+        """ Build the inverted index of a user's recipes """
+        return InvertedIndex(Recipe.objects.filter(
+            user_id=user_id
+        ).values_list('id', 'name', 'text').iterator())
+
+
+index_cache = IndexCache()
+
+
+def search_recipes(queryset, query, user):
+    """ Filter queryset to the recipes matching query, best match first """
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, query)
+    return _search_inverted_index(queryset, query, user)
+
+
+def _search_postgres(queryset, query):
+    """ Match through the GIN index and rank with weighted vectors """
+    from django.contrib.postgres.search import SearchQuery, SearchRank, \
+        SearchVector, SearchVectorField
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG)
+    weighted = (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+    return queryset.annotate(
+        document=RawSQL(SEARCH_DOCUMENT_SQL, [],
+                        output_field=SearchVectorField())
+    ).filter(document=search_query).annotate(
+        rank=SearchRank(weighted, search_query)
+    ).order_by('-rank', '-id')
+
+
+def _search_inverted_index(queryset, query, user):
+    """ Match through the user's in-process inverted index """
+    ids = index_cache.get(user.pk).search(query)
+    if not ids:
+        return queryset.none()
+    position = Case(
+        *[When(pk=pk, then=i) for i, pk in enumerate(ids)],
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ids).annotate(
+        search_position=position
+    ).order_by('search_position')
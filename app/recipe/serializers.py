@@ -1,7 +1,23 @@
+from django.db import transaction
+
 from rest_framework import serializers
 
 from core.models import Ingredient, Recipe
 
+from recipe.bulk import bulk_create_returning, set_recipe_ingredients
+from recipe.fields import UserScopedPrimaryKeyRelatedField
+from recipe.fieldsets import SparseFieldsetSerializerMixin
+
+
+class IngredientListSerializer(serializers.ListSerializer):
+    """ Create many ingredients with a single INSERT """
+
+    def create(self, validated_data):
+        """ Bulk create the validated ingredients and return them """
+        return bulk_create_returning(
+            Ingredient, [Ingredient(**item) for item in validated_data]
+        )
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for an ingredient object"""
@@ -10,19 +26,58 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = IngredientListSerializer
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsetSerializerMixin,
+                       serializers.ModelSerializer):
     """ Serialize a recipe"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserScopedPrimaryKeyRelatedField(
         many=True,
-        queryset = Ingredient.objects.all()
+        queryset=Ingredient.objects.all()
     )
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'text', 'ingredients',)
         read_only_fields = ('id', )
+        expandable_fields = {'ingredients': IngredientSerializer}
+
+    def update(self, instance, validated_data):
+        """
+            Update the recipe, inserting and deleting only the ingredient
+            links that changed instead of replacing them all
+        """
+        ingredients = validated_data.pop('ingredients', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if ingredients is not None:
+                # save() above already touched updated_at and the cache
+                set_recipe_ingredients(
+                    instance, [ingredient.pk for ingredient in ingredients]
+                )
+        return instance
+
+
+class RecipeIngredientsSerializer(serializers.Serializer):
+    """ Ingredient ids added to or removed from a recipe """
+    ingredients = UserScopedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Ingredient.objects.all()
+    )
+
+
+class RecipeMatchSerializer(RecipeSerializer):
+    """ Serialize a recipe matched against a set of ingredients """
+    matched_ingredients = serializers.IntegerField(read_only=True)
+    missing_ingredients = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'matched_ingredients', 'missing_ingredients', 'coverage',
+        )
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     """ Serialize a recipe detail """
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Ingredient, Recipe
+
+from recipe.cache import bump_generation
+
+
+def touch_recipes(queryset):
+    """ Move updated_at forward on recipes whose representation changed """
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner(sender, instance, **kwargs):
+    """ Invalidate the cached responses of the object's owner """
+    bump_generation(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_ingredients(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """ Invalidate the owner's cache when recipe ingredients change """
+    if reverse:
+        # instance is an ingredient, the recipes are in pk_set
+        if action in ('post_add', 'post_remove'):
+            touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+        elif action == 'pre_clear':
+            touch_recipes(Recipe.objects.filter(ingredients=instance))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        touch_recipes(Recipe.objects.filter(pk=instance.pk))
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation(instance.user_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_of_ingredient(sender, instance, created, **kwargs):
+    """ A renamed ingredient changes the detail of its recipes """
+    if not created:
+        touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_of_deleted_ingredient(sender, instance, **kwargs):
+    """ A deleted ingredient disappears from the detail of its recipes """
+    touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_new_user(sender, instance, created, **kwargs):
+    """ Start new users on a fresh generation in case the id is reused """
+    if created:
+        bump_generation(instance.pk)
@@ -0,0 +1,168 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.benchmark import percentile
+from core.models import Ingredient, Recipe
+
+from user.authentication import token_cache
+
+
+ASYNC_RECIPES_URL = reverse('recipe:async-recipe-list')
+ASYNC_INGREDIENTS_URL = reverse('recipe:async-ingredient-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def async_detail_url(recipe_id):
+    return reverse('recipe:async-recipe-detail', args=[recipe_id])
+
+
+class AsyncReadApiTests(TestCase):
+    """ Test the native async recipe and ingredient read endpoints """
+
+    def setUp(self):
+        caches['api'].clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Leek'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, name='Leek soup', text='Text'
+        )
+        self.recipe.ingredients.add(self.ingredient)
+
+    def test_requires_authentication(self):
+        """ Test the async endpoints reject anonymous requests """
+        res = APIClient().get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res['WWW-Authenticate'], 'Token')
+
+    def test_recipe_list_matches_sync_view(self):
+        """ Test the async list returns what the viewset returns """
+        sync = self.client.get(RECIPES_URL, {'ingredients': 'x'})
+        res = self.client.get(ASYNC_RECIPES_URL, {'ingredients': 'x'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json(), sync.json())
+
+        sync = self.client.get(RECIPES_URL)
+        res = self.client.get(ASYNC_RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync.json())
+
+    def test_paginated_links_not_shared_with_sync_view(self):
+        """ Test cached pages link to the path they were requested on """
+        Recipe.objects.create(user=self.user, name='Stew', text='Text')
+        self.client.get(RECIPES_URL, {'page_size': 1})
+
+        res = self.client.get(ASYNC_RECIPES_URL, {'page_size': 1})
+
+        self.assertIn(ASYNC_RECIPES_URL, res.json()['next'])
+
+    def test_recipe_detail(self):
+        """ Test the async detail view and its 404 """
+        res = self.client.get(async_detail_url(self.recipe.id))
+        missing = self.client.get(async_detail_url(self.recipe.id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['ingredients'][0]['name'], 'Leek')
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_recipe_not_found(self):
+        """ Test recipes of other users are not served """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com', 'test123'
+        )
+        recipe = Recipe.objects.create(user=user2, name='Stew', text='T')
+
+        res = self.client.get(async_detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_list_needs_no_query(self):
+        """ Test a cached token and cached list never reach the db """
+        self.client.get(ASYNC_INGREDIENTS_URL)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(ASYNC_INGREDIENTS_URL)
+
+        self.assertEqual(res.json(), [{'id': self.ingredient.id,
+                                       'name': 'Leek'}])
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_write_methods_not_allowed(self):
+        """ Test the async endpoints are read only """
+        res = self.client.post(ASYNC_RECIPES_URL, {'name': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsgiRequestTests(TestCase):
+    """ Test the async endpoints through the ASGI handler """
+
+    async def test_recipe_list(self):
+        """ Test the list is served by the ASGI handler """
+        from asgiref.sync import sync_to_async
+
+        def setup():
+            user = get_user_model().objects.create_user(
+                'test@kosta.com', 'test123'
+            )
+            Recipe.objects.create(user=user, name='Soup', text='Text')
+            return Token.objects.create(user=user).key
+
+        key = await sync_to_async(setup, thread_sensitive=True)()
+
+        res = await AsyncClient().get(
+            ASYNC_RECIPES_URL, AUTHORIZATION='Token ' + key
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)[0]['name'], 'Soup')
+
+
+class BenchAsgiCommandTests(TestCase):
+    """ Test the WSGI/ASGI comparison command """
+
+    def test_reports_both_servers(self):
+        """ Test every endpoint is measured through both servers """
+        get_user_model().objects.create_user('test@kosta.com', 'test123')
+        out = StringIO()
+
+        call_command(
+            'bench_asgi', requests=4, concurrency=1, json=True, stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            {(r['endpoint'], r['server']) for r in results},
+            {('recipe list', 'wsgi'), ('recipe list', 'asgi'),
+             ('ingredient list', 'wsgi'), ('ingredient list', 'asgi')}
+        )
+        self.assertEqual(results[0]['requests'], 4)
+
+    def test_percentile(self):
+        """ Test the nearest rank percentile """
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertIsNone(percentile([], 50))
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+from recipe.cache import get_generation
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """ Return recipe detail URL """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ResponseCacheTests(TestCase):
+    """ Test the per-user list response cache """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """ Test a repeated list request does not touch the database """
+        Recipe.objects.create(user=self.user, name='Soup', text='Text')
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_cached_separately(self):
+        """ Test different query parameters get different entries """
+        Ingredient.objects.create(user=self.user, name='Kale')
+        self.client.get(INGREDIENTS_URL)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.data, [])
+
+    def test_create_invalidates_list(self):
+        """ Test creating a recipe through the API invalidates the list """
+        self.client.get(RECIPES_URL)
+
+        self.client.post(RECIPES_URL, {'name': 'Curry', 'text': 'Text'})
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_update_and_delete_invalidate_list(self):
+        """ Test updating and deleting a recipe invalidate the list """
+        recipe = Recipe.objects.create(user=self.user, name='Soup', text='T')
+        self.client.get(RECIPES_URL)
+
+        self.client.patch(detail_url(recipe.id), {'name': 'Stew'})
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data[0]['name'], 'Stew')
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data, [])
+
+    def test_ingredient_changes_invalidate_list(self):
+        """ Test changing a recipe's ingredients invalidates the list """
+        recipe = Recipe.objects.create(user=self.user, name='Soup', text='T')
+        ingredient = Ingredient.objects.create(user=self.user, name='Leek')
+        self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        recipe.ingredients.add(ingredient)
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data), 1)
+
+        recipe.ingredients.clear()
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        self.assertEqual(res.data, [])
+
+    def test_cache_is_per_user(self):
+        """ Test one user's writes only invalidate their own cache """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        generation = get_generation(self.user.pk)
+
+        Recipe.objects.create(user=user2, name='Soup', text='Text')
+
+        self.assertEqual(get_generation(self.user.pk), generation)
+        self.assertEqual(self.client.get(RECIPES_URL).data, [])
+
+    @override_settings(API_CACHE_ALIAS=None)
+    def test_cache_disabled(self):
+        """ Test lists are built on every request when disabled """
+        self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(RECIPES_URL)
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """ Return recipe detail URL """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """ Test ETag and Last-Modified handling of the recipe API """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """ Test a matching If-None-Match on a list returns 304 """
+        Recipe.objects.create(user=self.user, name='Soup', text='Text')
+        res = self.client.get(RECIPES_URL)
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag']
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_list_etag_changes_on_write(self):
+        """ Test the list ETag changes when the collection changes """
+        res = self.client.get(INGREDIENTS_URL)
+        etag = res['ETag']
+
+        Ingredient.objects.create(user=self.user, name='Kale')
+        res = self.client.get(INGREDIENTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_etag_depends_on_query(self):
+        """ Test filtered lists do not share the unfiltered ETag """
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(
+            RECIPES_URL, {'ingredients': '1'}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified_without_serializing(self):
+        """ Test a matching detail ETag is answered with one query """
+        recipe = Recipe.objects.create(user=self.user, name='Soup', text='T')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_detail_if_modified_since(self):
+        """ Test If-Modified-Since on a detail returns 304 """
+        recipe = Recipe.objects.create(user=self.user, name='Soup', text='T')
+        last_modified = self.client.get(detail_url(recipe.id))['Last-Modified']
+
+        res = self.client.get(
+            detail_url(recipe.id), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_with_ingredients(self):
+        """ Test adding or renaming an ingredient changes the detail ETag """
+        recipe = Recipe.objects.create(user=self.user, name='Soup', text='T')
+        ingredient = Ingredient.objects.create(user=self.user, name='Leek')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        recipe.ingredients.add(ingredient)
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        ingredient.name = 'Onion'
+        ingredient.save()
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['ingredients'][0]['name'], 'Onion')
+
+    def test_detail_of_other_user_not_found(self):
+        """ Test validators are not leaked for other users' recipes """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        recipe = Recipe.objects.create(user=user2, name='Soup', text='T')
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
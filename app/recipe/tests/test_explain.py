@@ -0,0 +1,71 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe
+
+from recipe.management.commands.explain_endpoints import Command
+
+
+class ExplainEndpointsCommandTests(TestCase):
+    """ Test the explain_endpoints management command """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        ingredient = Ingredient.objects.create(user=self.user, name='Leek')
+        recipe = Recipe.objects.create(
+            user=self.user, name='Leek soup', text='Text'
+        )
+        recipe.ingredients.add(ingredient)
+
+    def test_endpoints_use_indexes(self):
+        """ Test no endpoint query scans a recipe table sequentially """
+        out = StringIO()
+
+        call_command(
+            'explain_endpoints', fail_on_seq_scan=True, stdout=out
+        )
+
+        self.assertIn('recipe detail', out.getvalue())
+        self.assertIn('No sequential scans', out.getvalue())
+
+    def test_fail_on_seq_scan(self):
+        """ Test a sequential scan fails the command when asked to """
+        # One line in the format of each supported database
+        plan = ['SCAN core_recipe', 'Seq Scan on core_recipe']
+        with patch.object(Command, 'explain', return_value=plan):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'explain_endpoints', email=self.user.email,
+                    fail_on_seq_scan=True, stdout=StringIO()
+                )
+
+    def test_find_seq_scans(self):
+        """ Test full scans are told apart from index searches """
+        command = Command()
+
+        found = command.find_seq_scans([
+            'SCAN core_recipe',
+            'SCAN core_ingredient USING INDEX ingredient_user_name_id_idx',
+            'SEARCH core_recipe_ingredients USING COVERING INDEX x (a=?)',
+            'SCAN core_user',
+        ], vendor='sqlite')
+
+        self.assertEqual(found, ['core_recipe'])
+
+    def test_find_seq_scans_postgresql(self):
+        """ Test PostgreSQL sequential scans are detected """
+        found = Command().find_seq_scans([
+            'Sort  (cost=1.05..1.06 rows=1 width=40)',
+            '  ->  Seq Scan on core_ingredient  (cost=0.00..1.04 rows=1)',
+            '  ->  Index Scan using recipe_user_id_idx on core_recipe',
+        ], vendor='postgresql')
+
+        self.assertEqual(found, ['core_ingredient'])
@@ -0,0 +1,117 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+from recipe.exporter import RecipeExporter
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class ExportApiTests(TestCase):
+    """ Test the streaming recipe export """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.leek = Ingredient.objects.create(user=self.user, name='Leek')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.soup = Recipe.objects.create(
+            user=self.user, name='Soup', text='Boil it'
+        )
+        self.soup.ingredients.add(self.leek, self.salt)
+        self.toast = Recipe.objects.create(
+            user=self.user, name='Toast', text='Toast it'
+        )
+
+    def _content(self, res):
+        """ Return the decoded body of a streaming response """
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_jsonl(self):
+        """ Test exporting recipes as JSON Lines """
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._content(res).splitlines()]
+        self.assertEqual(rows, [
+            {
+                'id': self.soup.id, 'name': 'Soup', 'text': 'Boil it',
+                'ingredients': [
+                    {'id': self.leek.id, 'name': 'Leek'},
+                    {'id': self.salt.id, 'name': 'Salt'},
+                ],
+            },
+            {
+                'id': self.toast.id, 'name': 'Toast', 'text': 'Toast it',
+                'ingredients': [],
+            },
+        ])
+
+    def test_export_csv(self):
+        """ Test exporting recipes as CSV """
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(self._content(res))))
+        self.assertEqual(rows[0], ['id', 'name', 'text', 'ingredients'])
+        self.assertEqual(rows[1], [str(self.soup.id), 'Soup', 'Boil it',
+                                   'Leek;Salt'])
+        self.assertEqual(len(rows), 3)
+
+    def test_export_accept_headers(self):
+        """ Test clients accepting only the export format are answered """
+        for export_format, media_type in RecipeExporter.formats.items():
+            res = self.client.get(
+                EXPORT_URL, {'type': export_format}, HTTP_ACCEPT=media_type
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res['Content-Type'], media_type)
+
+        res = self.client.get(EXPORT_URL, {'type': 'xml'},
+                              HTTP_ACCEPT='text/csv')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res['Content-Type'], 'application/json')
+
+    def test_export_invalid_type(self):
+        """ Test an unknown export type is rejected """
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_limited_to_user(self):
+        """ Test only the user's recipes are exported """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        Recipe.objects.create(user=user2, name='Other', text='Text')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(len(self._content(res).splitlines()), 2)
+
+    def test_export_chunks_query_count(self):
+        """ Test ingredients are fetched with one query per chunk """
+        exporter = RecipeExporter(self.user, chunk_size=1)
+
+        with self.assertNumQueries(3):
+            chunks = list(exporter.iter_chunks())
+
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
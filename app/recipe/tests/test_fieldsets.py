@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(API_CACHE_ALIAS=None)
+class SparseFieldsetTests(TestCase):
+    """ Test ?fields= and ?expand= on the recipe endpoints """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.egg = Ingredient.objects.create(user=self.user, name='Egg')
+        self.recipe = Recipe.objects.create(
+            user=self.user, name='Omelette', text='Beat the eggs'
+        )
+        self.recipe.ingredients.add(self.salt, self.egg)
+        Recipe.objects.create(user=self.user, name='Water', text='Pour')
+
+    def test_list_fields(self):
+        """ Test only the selected fields are returned and queried """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': self.recipe.id + 1, 'name': 'Water'},
+            {'id': self.recipe.id, 'name': 'Omelette'},
+        ])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"text"', queries[0]['sql'])
+
+    def test_list_expand(self):
+        """ Test expanded ingredients are nested with two queries """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'expand': 'ingredients'})
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(res.data[1]['ingredients'], [
+            {'id': self.salt.id, 'name': 'Salt'},
+            {'id': self.egg.id, 'name': 'Egg'},
+        ])
+
+    def test_serializer_path_matches_rows(self):
+        """ Test the serializers honour the parameters the same way """
+        params = {'fields': 'name,ingredients', 'expand': 'ingredients'}
+        res = self.client.get(RECIPES_URL, params)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.content, expected.content)
+
+    def test_match_fields(self):
+        """ Test match annotations can be selected """
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': self.salt.id, 'match': 'coverage',
+            'fields': 'name,coverage',
+        })
+
+        self.assertEqual(res.data, [{'name': 'Omelette', 'coverage': 0.5}])
+
+    def test_cursor_pagination_without_id(self):
+        """ Test cursors still work when the id is not returned """
+        res = self.client.get(RECIPES_URL, {'fields': 'name', 'page_size': 1})
+        second = self.client.get(res.data['next'])
+
+        self.assertEqual(res.data['results'], [{'name': 'Omelette'}])
+        self.assertEqual(second.data['results'], [{'name': 'Water'}])
+
+    def test_retrieve_fields(self):
+        """ Test the detail is narrowed without loading the ingredients """
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(detail_url(self.recipe.id), {
+                'fields': 'name'
+            })
+
+        self.assertEqual(res.data, {'name': 'Omelette'})
+        self.assertTrue(res.has_header('ETag'))
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_field(self):
+        """ Test unknown fields and expansions are rejected """
+        res = self.client.get(RECIPES_URL, {'fields': 'name,user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+        res = self.client.get(RECIPES_URL, {'expand': 'user'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', res.data)
+
+    def test_writes_ignore_fields(self):
+        """ Test ?fields= does not change what a create accepts """
+        res = self.client.post(RECIPES_URL + '?fields=name', {
+            'name': 'Tea', 'text': 'Steep', 'ingredients': []
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['text'], 'Steep')
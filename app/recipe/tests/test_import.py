@@ -0,0 +1,180 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+from recipe.importer import RecipeImporter
+
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+
+
+def ndjson(*items):
+    """ Return items encoded as newline-delimited JSON """
+    return ''.join(json.dumps(item) + '\n' for item in items)
+
+
+class RecipeImporterTests(TestCase):
+    """ Test importing recipes in batches """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+
+    def test_import_creates_recipes_and_ingredients(self):
+        """ Test recipes are linked to existing and new ingredients """
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        lines = ndjson(
+            {'name': 'Soup', 'text': 'Boil', 'ingredients': ['Salt', 'Leek']},
+            {'name': 'Salad', 'ingredients': ['Leek', 'Leek']},
+            {'name': 'Toast'},
+        ).splitlines()
+
+        summary = RecipeImporter(self.user, batch_size=2).import_lines(lines)
+
+        self.assertEqual(summary, {'created': 3, 'failed': 0, 'errors': []})
+        soup = Recipe.objects.get(user=self.user, name='Soup')
+        self.assertEqual(soup.text, 'Boil')
+        self.assertEqual(
+            sorted(soup.ingredients.values_list('name', flat=True)),
+            ['Leek', 'Salt']
+        )
+        self.assertIn(salt, soup.ingredients.all())
+        salad = Recipe.objects.get(user=self.user, name='Salad')
+        self.assertEqual(salad.ingredients.count(), 1)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user, name='Leek').count(), 1
+        )
+
+    def test_import_reports_invalid_lines(self):
+        """ Test invalid lines are skipped and reported by line number """
+        lines = [
+            '{"name": "Soup"}',
+            'not json',
+            '',
+            '{"name": ""}',
+            '{"name": "Stew", "ingredients": "Salt"}',
+        ]
+
+        summary = RecipeImporter(self.user).import_lines(lines)
+
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(summary['failed'], 3)
+        self.assertEqual([e['line'] for e in summary['errors']], [2, 4, 5])
+
+    def test_import_strips_names(self):
+        """ Test names are stored and length checked without whitespace """
+        importer = RecipeImporter(self.user)
+        long_name = ' {} '.format('x' * importer.max_name_length)
+        lines = ndjson(
+            {'name': '  Soup ', 'ingredients': [' Leek', 'Leek ']},
+            {'name': long_name, 'ingredients': [long_name]},
+        ).splitlines()
+
+        summary = importer.import_lines(lines)
+
+        self.assertEqual(summary['failed'], 0)
+        soup = Recipe.objects.get(user=self.user, name='Soup')
+        self.assertEqual(
+            list(soup.ingredients.values_list('name', flat=True)), ['Leek']
+        )
+        self.assertTrue(
+            Recipe.objects.filter(name=long_name.strip()).exists()
+        )
+
+    def test_import_uses_user_ingredients_only(self):
+        """ Test ingredients of other users are never linked """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        Ingredient.objects.create(user=user2, name='Salt')
+
+        RecipeImporter(self.user).import_lines(
+            [json.dumps({'name': 'Soup', 'ingredients': ['Salt']})]
+        )
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.ingredients.get().user, self.user)
+
+
+class ImportApiTests(TestCase):
+    """ Test the NDJSON import endpoint """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_import_endpoint(self):
+        """ Test posting NDJSON imports the recipes """
+        body = ndjson(
+            {'name': 'Soup', 'ingredients': ['Leek']},
+            {'name': 'Stew', 'ingredients': ['Leek', 'Beef']},
+        )
+
+        res = self.client.post(
+            IMPORT_URL, body, content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_import_empty_body(self):
+        """ Test an empty body is rejected """
+        res = self.client.post(
+            IMPORT_URL, '', content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_requires_auth(self):
+        """ Test the import endpoint requires authentication """
+        res = APIClient().post(
+            IMPORT_URL, ndjson({'name': 'Soup'}),
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ImportCommandTests(TestCase):
+    """ Test the import_recipes management command """
+
+    def test_import_command(self):
+        """ Test importing a file for a user """
+        user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as f:
+            f.write(ndjson({'name': 'Soup'}, {'name': 'Stew'}))
+            f.flush()
+            out = StringIO()
+            call_command(
+                'import_recipes', f.name, email=user.email, stdout=out
+            )
+
+        self.assertEqual(json.loads(out.getvalue())['created'], 2)
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 2)
+
+    def test_import_command_unknown_user(self):
+        """ Test the command fails for an unknown user """
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', '-', email='nobody@kosta.com')
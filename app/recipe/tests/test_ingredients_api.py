@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -125,3 +125,51 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_bulk_create_ingredients(self):
+        """ Test creating several ingredients from a JSON array """
+        payload = [{'name': 'Salt'}, {'name': 'Pepper'}, {'name': 'Basil'}]
+
+        res = self.client.post(INGREDIENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in res.data],
+                         ['Salt', 'Pepper', 'Basil'])
+        ingredients = Ingredient.objects.filter(user=self.user)
+        self.assertEqual(ingredients.count(), 3)
+        self.assertEqual(
+            sorted(item['id'] for item in res.data),
+            sorted(ingredients.values_list('id', flat=True))
+        )
+
+    def test_bulk_create_reports_item_errors(self):
+        """ Test an invalid item reports its error and creates nothing """
+        payload = [{'name': 'Salt'}, {'name': ''}, {}]
+
+        res = self.client.post(INGREDIENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('name', res.data[2])
+        self.assertFalse(Ingredient.objects.filter(user=self.user).exists())
+
+    @override_settings(INGREDIENT_BULK_MAX_BATCH=2)
+    def test_bulk_create_max_batch(self):
+        """ Test batches over the configured maximum are rejected """
+        payload = [{'name': 'Salt'}, {'name': 'Pepper'}, {'name': 'Basil'}]
+
+        res = self.client.post(INGREDIENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ingredient.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_invalidates_list(self):
+        """ Test a bulk create shows up in the next list response """
+        self.client.get(INGREDIENTS_URL)
+
+        self.client.post(INGREDIENTS_URL, [{'name': 'Salt'}], format='json')
+        res = self.client.get(INGREDIENTS_URL)
+
+        self.assertEqual(len(res.data), 1)
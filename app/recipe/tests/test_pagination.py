@@ -0,0 +1,116 @@
+from base64 import b64decode
+from urllib import parse
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class PaginationApiTests(TestCase):
+    """ Test the opt-in pagination of the recipe list endpoints """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _walk_cursor(self, url, page_size):
+        """ Follow the next links and return all pages """
+        pages = []
+        res = self.client.get(url, {'page_size': page_size})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data['results'])
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_not_paginated_by_default(self):
+        """ Test the recipe list stays a plain list without parameters """
+        Recipe.objects.create(user=self.user, name='Soup', text='Text')
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_recipes_cursor_pagination(self):
+        """ Test walking recipes with a cursor returns each recipe once """
+        ids = [
+            Recipe.objects.create(
+                user=self.user, name='Recipe %d' % i, text='Text'
+            ).id
+            for i in range(7)
+        ]
+
+        pages = self._walk_cursor(RECIPES_URL, 3)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        walked = [recipe['id'] for page in pages for recipe in page]
+        self.assertEqual(walked, sorted(ids))
+
+    def test_ingredients_cursor_pagination(self):
+        """ Test ingredients are paged by name with duplicate names kept """
+        for name in ('Apple', 'Kale', 'Kale', 'Salt', 'Basil'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        pages = self._walk_cursor(INGREDIENTS_URL, 2)
+
+        walked = [ing['name'] for page in pages for ing in page]
+        self.assertEqual(walked, ['Salt', 'Kale', 'Kale', 'Basil', 'Apple'])
+
+    def test_ingredients_cursor_keyed_on_name_and_id(self):
+        """ Test runs of equal names are paged by position, not offset """
+        ids = [
+            Ingredient.objects.create(user=self.user, name=name).id
+            for name in ['Salt'] + ['Kale'] * 5 + ['Basil']
+        ]
+
+        pages = self._walk_cursor(INGREDIENTS_URL, 2)
+        res = self.client.get(INGREDIENTS_URL, {'page_size': 2})
+        second = self.client.get(res.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual([ing['id'] for page in pages for ing in page], ids)
+        cursor = parse.parse_qs(parse.urlparse(res.data['next']).query)
+        position = parse.parse_qs(b64decode(cursor['cursor'][0]).decode())
+        self.assertNotIn('o', position)
+        self.assertEqual(back.data['results'], res.data['results'])
+
+    def test_ingredients_cursor_limited_to_user(self):
+        """ Test cursor pages only contain the user's ingredients """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        Ingredient.objects.create(user=user2, name='Vinegar')
+        Ingredient.objects.create(user=self.user, name='Tumeric')
+
+        res = self.client.get(INGREDIENTS_URL, {'page_size': 10})
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], 'Tumeric')
+
+    def test_recipes_offset_pagination(self):
+        """ Test limit/offset pagination is still available """
+        for i in range(5):
+            Recipe.objects.create(
+                user=self.user, name='Recipe %d' % i, text='Text'
+            )
+
+        res = self.client.get(RECIPES_URL, {'limit': 2, 'offset': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+        self.assertEqual(len(res.data['results']), 2)
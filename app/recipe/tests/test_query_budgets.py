@@ -0,0 +1,254 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """ Return recipe detail URL """
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class QueryBudgetMixin:
+    """
+        Assertions that pin the number of SQL queries an endpoint may run.
+        A budget is the maximum number of queries allowed for one request,
+        and assertConstantQueries checks that the budget holds for several
+        dataset sizes, which is what catches N+1 regressions.
+    """
+
+    def assertQueryBudget(self, budget, func, *args, **kwargs):
+        """ Call func and fail if it runs more than budget queries """
+        with CaptureQueriesContext(connection) as ctx:
+            result = func(*args, **kwargs)
+        if len(ctx) > budget:
+            queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+            self.fail('%d queries executed, budget is %d:\n%s' % (
+                len(ctx), budget, queries))
+        return result
+
+    def assertConstantQueries(self, budget, seed, request, sizes=(1, 5, 20)):
+        """
+            Grow the dataset with seed(n) and check that request() stays
+            within budget at every size
+        """
+        created = 0
+        for size in sizes:
+            seed(size - created)
+            created = size
+            res = self.assertQueryBudget(budget, request)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """ Test the query budgets of the recipe endpoints """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'budget@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _seed_recipes(self, count):
+        """ Create count recipes with two ingredients each """
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                user=self.user, name='Recipe %d' % i, text='Some text'
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name='Salt'),
+                Ingredient.objects.create(user=self.user, name='Pepper'),
+            )
+
+    def test_list_recipes_budget(self):
+        """ Test listing recipes does not run a query per recipe """
+        self.assertConstantQueries(
+            2, self._seed_recipes, lambda: self.client.get(RECIPES_URL)
+        )
+
+    def test_filter_recipes_budget(self):
+        """ Test filtering recipes by ingredient stays constant """
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+
+        def seed(count):
+            self._seed_recipes(count)
+            for recipe in Recipe.objects.filter(user=self.user):
+                recipe.ingredients.add(ingredient)
+
+        self.assertConstantQueries(2, seed, lambda: self.client.get(
+            RECIPES_URL, {'ingredients': str(ingredient.id)}
+        ))
+
+    def test_match_recipes_budget(self):
+        """ Test coverage matching is one aggregate query per request """
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+
+        def seed(count):
+            self._seed_recipes(count)
+            for recipe in Recipe.objects.filter(user=self.user):
+                recipe.ingredients.add(ingredient)
+
+        self.assertConstantQueries(2, seed, lambda: self.client.get(
+            RECIPES_URL, {'ingredients': str(ingredient.id),
+                          'match': 'coverage', 'max_missing': 2}
+        ))
+
+    def test_retrieve_recipe_budget(self):
+        """ Test retrieving a recipe does not run a query per ingredient """
+        recipe = Recipe.objects.create(
+            user=self.user, name='Stew', text='Some text'
+        )
+
+        def seed(count):
+            for i in range(count):
+                recipe.ingredients.add(
+                    Ingredient.objects.create(user=self.user, name='Leek')
+                )
+
+        self.assertConstantQueries(
+            2, seed, lambda: self.client.get(detail_url(recipe.id))
+        )
+
+    def test_create_recipe_budget(self):
+        """ Test creating a recipe with ingredients """
+        ingredient1 = Ingredient.objects.create(user=self.user, name='Rice')
+        ingredient2 = Ingredient.objects.create(user=self.user, name='Peas')
+        payload = {
+            'name': 'Risotto',
+            'text': 'Some text',
+            'ingredients': [ingredient1.id, ingredient2.id],
+        }
+
+        res = self.assertQueryBudget(
+            7, self.client.post, RECIPES_URL, payload
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_recipe_many_ingredients_budget(self):
+        """ Test ingredient ids are validated in one query, not one each """
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=str(i))
+            for i in range(40)
+        ]
+        payload = {
+            'name': 'Stew',
+            'text': 'Some text',
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        }
+
+        res = self.assertQueryBudget(
+            7, self.client.post, RECIPES_URL, payload
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_update_recipe_budget(self):
+        """ Test updating a recipe and its ingredients """
+        self._seed_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        ingredient = Ingredient.objects.create(user=self.user, name='Chard')
+        payload = {'name': 'Updated', 'ingredients': [ingredient.id]}
+
+        res = self.assertQueryBudget(
+            9, self.client.patch, detail_url(recipe.id), payload
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_change_ingredients_budget(self):
+        """ Test add and remove write the links in one statement each """
+        self._seed_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name='Extra %d' % i)
+            for i in range(20)
+        ]
+        payload = {'ingredients': [i.id for i in ingredients]}
+
+        for name in ('recipe:recipe-add-ingredients',
+                     'recipe:recipe-remove-ingredients'):
+            res = self.assertQueryBudget(
+                7, self.client.post, reverse(name, args=[recipe.id]), payload
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_recipe_budget(self):
+        """ Test deleting a recipe """
+        self._seed_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+
+        res = self.assertQueryBudget(
+            3, self.client.delete, detail_url(recipe.id)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class IngredientQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """ Test the query budgets of the ingredient endpoints """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'budget@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _seed_ingredients(self, count):
+        """ Create count ingredients used by one recipe """
+        recipe = Recipe.objects.create(
+            user=self.user, name='Salad', text='Some text'
+        )
+        for i in range(count):
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name='Item %d' % i)
+            )
+
+    def test_list_ingredients_budget(self):
+        """ Test listing ingredients runs a single query """
+        self.assertConstantQueries(
+            1, self._seed_ingredients,
+            lambda: self.client.get(INGREDIENTS_URL)
+        )
+
+    def test_list_assigned_ingredients_budget(self):
+        """ Test listing assigned ingredients runs a single query """
+        self.assertConstantQueries(
+            1, self._seed_ingredients,
+            lambda: self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        )
+
+    def test_create_ingredient_budget(self):
+        """ Test creating an ingredient runs a single insert """
+        res = self.assertQueryBudget(
+            1, self.client.post, INGREDIENTS_URL, {'name': 'Basil'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @skipUnlessDBFeature('can_return_rows_from_bulk_insert')
+    def test_bulk_create_ingredients_budget(self):
+        """ Test a batch of ingredients is written with a single INSERT """
+        payload = [{'name': 'Item %d' % i} for i in range(50)]
+
+        # The INSERT plus the savepoint around it
+        res = self.assertQueryBudget(
+            3, self.client.post, INGREDIENTS_URL, payload, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -135,6 +135,41 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_other_users_ingredient(self):
+        """ Test ingredients of other users are rejected """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        ingredient = sample_ingredient(user=user2, name='Saffron')
+        payload = {
+            'name': 'Paella',
+            'ingredients': [ingredient.id],
+            'text': 'some text'
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_reports_every_invalid_ingredient(self):
+        """ Test every invalid ingredient id is reported at once """
+        ingredient = sample_ingredient(user=self.user)
+        payload = {
+            'name': 'Cake',
+            'ingredients': [ingredient.id, 9998, 'x', 9999],
+            'text': 'some text'
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = ' '.join(res.data['ingredients'])
+        self.assertEqual(len(res.data['ingredients']), 3)
+        self.assertIn('9998', errors)
+        self.assertIn('9999', errors)
+
     def test_partial_update_recipe(self):
         """ Test updating a recipe with patch """
         recipe = sample_recipe(user=self.user)
@@ -194,3 +229,201 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertIn(serializer2.data, res.data)
         self.assertNotIn(serializer3.data, res.data)
+
+    def test_filter_recipes_by_ingredients_unique(self):
+        """ Test recipes matching several ingredients are listed once """
+        recipe = sample_recipe(user=self.user)
+        ingredient1 = sample_ingredient(user=self.user, name='Something 1')
+        ingredient2 = sample_ingredient(user=self.user, name='Something 2')
+        recipe.ingredients.add(ingredient1, ingredient2)
+
+        res = self.client.get(
+                RECIPES_URL,
+                {'ingredients': '{},{}'.format(ingredient1.id, ingredient2.id)}
+                )
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_filter_recipes_containing_all_ingredients(self):
+        """ Test match=all only returns recipes with every ingredient """
+        ingredient1 = sample_ingredient(user=self.user, name='Eggs')
+        ingredient2 = sample_ingredient(user=self.user, name='Flour')
+        both = sample_recipe(user=self.user, name='Pancakes')
+        both.ingredients.add(ingredient1, ingredient2)
+        one = sample_recipe(user=self.user, name='Omelette')
+        one.ingredients.add(ingredient1)
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': '{},{}'.format(ingredient1.id, ingredient2.id),
+            'match': 'all',
+        })
+
+        self.assertEqual([r['name'] for r in res.data], ['Pancakes'])
+
+    def test_match_recipes_by_coverage(self):
+        """ Test match=coverage ranks by the share of ingredients owned """
+        eggs = sample_ingredient(user=self.user, name='Eggs')
+        flour = sample_ingredient(user=self.user, name='Flour')
+        milk = sample_ingredient(user=self.user, name='Milk')
+        sugar = sample_ingredient(user=self.user, name='Sugar')
+        pancakes = sample_recipe(user=self.user, name='Pancakes')
+        pancakes.ingredients.add(eggs, flour, milk)
+        omelette = sample_recipe(user=self.user, name='Omelette')
+        omelette.ingredients.add(eggs)
+        cake = sample_recipe(user=self.user, name='Cake')
+        cake.ingredients.add(eggs, flour, milk, sugar)
+        sample_recipe(user=self.user, name='Toast')
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': '{},{}'.format(eggs.id, flour.id),
+            'match': 'coverage',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['name'], r['missing_ingredients']) for r in res.data],
+            [('Omelette', 0), ('Pancakes', 1), ('Cake', 2)]
+        )
+        self.assertEqual(res.data[0]['coverage'], 1.0)
+        self.assertAlmostEqual(res.data[1]['coverage'], 2 / 3)
+
+    def test_match_recipes_max_missing(self):
+        """ Test max_missing drops recipes missing too many ingredients """
+        eggs = sample_ingredient(user=self.user, name='Eggs')
+        flour = sample_ingredient(user=self.user, name='Flour')
+        milk = sample_ingredient(user=self.user, name='Milk')
+        pancakes = sample_recipe(user=self.user, name='Pancakes')
+        pancakes.ingredients.add(eggs, flour, milk)
+        omelette = sample_recipe(user=self.user, name='Omelette')
+        omelette.ingredients.add(eggs)
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': str(eggs.id),
+            'match': 'coverage',
+            'max_missing': 1,
+        })
+
+        self.assertEqual([r['name'] for r in res.data], ['Omelette'])
+
+    def test_match_coverage_paginated_by_offset(self):
+        """ Test coverage ranking survives paging, cursors are refused """
+        eggs = sample_ingredient(user=self.user, name='Eggs')
+        for name, extra in (('Omelette', 0), ('Cake', 3), ('Pancakes', 1),
+                            ('Crepes', 2)):
+            recipe = sample_recipe(user=self.user, name=name)
+            recipe.ingredients.add(eggs, *[
+                sample_ingredient(user=self.user, name=name + str(i))
+                for i in range(extra)
+            ])
+        params = {'ingredients': str(eggs.id), 'match': 'coverage'}
+
+        names = []
+        for offset in (0, 2):
+            res = self.client.get(RECIPES_URL, dict(
+                params, limit=2, offset=offset
+            ))
+            names += [r['name'] for r in res.data['results']]
+        res = self.client.get(RECIPES_URL, dict(params, page_size=2))
+
+        self.assertEqual(names, ['Omelette', 'Pancakes', 'Crepes', 'Cake'])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('match', res.data)
+
+    def test_match_invalid_parameters(self):
+        """ Test invalid matching parameters are rejected """
+        for params in ({'ingredients': 'a,b'},
+                       {'ingredients': '1', 'match': 'some'},
+                       {'ingredients': '1', 'match': 'coverage',
+                        'max_missing': '-1'}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_keeps_unchanged_ingredient_links(self):
+        """ Test an update only writes the ingredient links that changed """
+        recipe = sample_recipe(user=self.user)
+        kept = sample_ingredient(user=self.user, name='Kept')
+        dropped = sample_ingredient(user=self.user, name='Dropped')
+        added = sample_ingredient(user=self.user, name='Added')
+        recipe.ingredients.add(kept, dropped)
+        through = Recipe.ingredients.through
+        kept_link = through.objects.get(recipe=recipe, ingredient=kept).id
+
+        res = self.client.patch(detail_url(recipe.id), {
+            'ingredients': [kept.id, added.id]
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(res.data['ingredients']),
+                         sorted([kept.id, added.id]))
+        self.assertTrue(through.objects.filter(id=kept_link).exists())
+
+    def test_add_ingredients(self):
+        """ Test adding ingredients keeps the existing ones """
+        recipe = sample_recipe(user=self.user)
+        salt = sample_ingredient(user=self.user, name='Salt')
+        pepper = sample_ingredient(user=self.user, name='Pepper')
+        recipe.ingredients.add(salt)
+        url = reverse('recipe:recipe-add-ingredients', args=[recipe.id])
+
+        res = self.client.post(url, {'ingredients': [salt.id, pepper.id]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(res.data['ingredients']),
+                         sorted([salt.id, pepper.id]))
+
+    def test_remove_ingredients(self):
+        """ Test removing ingredients leaves the others and ignores extras """
+        recipe = sample_recipe(user=self.user)
+        salt = sample_ingredient(user=self.user, name='Salt')
+        pepper = sample_ingredient(user=self.user, name='Pepper')
+        unused = sample_ingredient(user=self.user, name='Unused')
+        recipe.ingredients.add(salt, pepper)
+        url = reverse('recipe:recipe-remove-ingredients', args=[recipe.id])
+
+        res = self.client.post(url, {'ingredients': [pepper.id, unused.id]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['ingredients'], [salt.id])
+
+    def test_change_ingredients_refreshes_cached_list(self):
+        """ Test add and remove invalidate cached lists and validators """
+        recipe = sample_recipe(user=self.user)
+        salt = sample_ingredient(user=self.user, name='Salt')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+        self.client.get(RECIPES_URL)
+
+        self.client.post(
+            reverse('recipe:recipe-add-ingredients', args=[recipe.id]),
+            {'ingredients': [salt.id]}
+        )
+
+        self.assertEqual(
+            self.client.get(RECIPES_URL).data[0]['ingredients'], [salt.id]
+        )
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_change_ingredients_scoped_to_user(self):
+        """ Test other users' ingredients and recipes are refused """
+        other = get_user_model().objects.create_user(
+            'other@kosta.com', 'password123'
+        )
+        recipe = sample_recipe(user=self.user)
+        theirs = sample_ingredient(user=other, name='Theirs')
+        their_recipe = sample_recipe(user=other)
+        mine = sample_ingredient(user=self.user, name='Mine')
+
+        res = self.client.post(
+            reverse('recipe:recipe-add-ingredients', args=[recipe.id]),
+            {'ingredients': [theirs.id]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            reverse('recipe:recipe-add-ingredients', args=[their_recipe.id]),
+            {'ingredients': [mine.id]}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(recipe.ingredients.exists())
+        self.assertFalse(their_recipe.ingredients.exists())
@@ -0,0 +1,109 @@
+import json
+from io import StringIO
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+@override_settings(API_CACHE_ALIAS=None)
+class RowListTests(TestCase):
+    """ Test lists built from values() rows match the serializers """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.egg = Ingredient.objects.create(user=self.user, name='Egg')
+        Ingredient.objects.create(user=self.user, name='Unused')
+        omelette = Recipe.objects.create(
+            user=self.user, name='Omelette', text='Beat the eggs'
+        )
+        omelette.ingredients.add(self.egg, self.salt)
+        soup = Recipe.objects.create(
+            user=self.user, name='Soup', text='Salt the soup'
+        )
+        soup.ingredients.add(self.salt)
+        Recipe.objects.create(user=self.user, name='Water', text='Pour')
+
+    def _assert_same(self, url, params=None):
+        """ Assert the row and serializer paths return the same body """
+        res = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+        return res
+
+    def test_recipe_list(self):
+        """ Test the recipe list with its ingredient ids """
+        res = self._assert_same(RECIPES_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_recipe_match(self):
+        """ Test matched lists keep their annotations """
+        ids = '{},{}'.format(self.salt.id, self.egg.id)
+        for mode in ('any', 'all', 'coverage'):
+            self._assert_same(RECIPES_URL, {'ingredients': ids, 'match': mode})
+
+    def test_recipe_search(self):
+        """ Test search results keep their ranking """
+        self._assert_same(RECIPES_URL, {'search': 'salt'})
+
+    def test_recipe_pagination(self):
+        """ Test both paginators page over rows """
+        res = self._assert_same(RECIPES_URL, {'page_size': 2})
+        self._assert_same(res.data['next'])
+        self._assert_same(RECIPES_URL, {'limit': 2, 'offset': 1})
+
+    def test_ingredient_list(self):
+        """ Test the ingredient list, all and assigned only """
+        self._assert_same(INGREDIENTS_URL)
+        res = self._assert_same(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_msgpack_negotiated(self):
+        """ Test asking for MessagePack returns the same data """
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            msgpack.unpackb(res.content),
+            json.loads(self.client.get(RECIPES_URL).content)
+        )
+
+
+class BenchSerializationCommandTests(TestCase):
+    """ Test the serialization benchmark command """
+
+    def test_reports_every_step(self):
+        """ Test each step is timed and the data is rolled back """
+        out = StringIO()
+        call_command(
+            'bench_serialization', recipes=5, ingredients=2, repeat=1,
+            json=True, stdout=out
+        )
+
+        steps = [r['step'] for r in json.loads(out.getvalue())]
+        self.assertIn('values rows', steps)
+        self.assertIn('render msgpack', steps)
+        self.assertFalse(get_user_model().objects.exists())
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe
+
+from recipe.search import InvertedIndex, index_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class InvertedIndexTests(TestCase):
+    """ Test the in-process inverted index used without PostgreSQL """
+
+    def setUp(self):
+        self.index = InvertedIndex([
+            (1, 'Tomato soup', 'Blend the tomato with garlic'),
+            (2, 'Garlic bread', 'Toast the bread'),
+            (3, 'Pasta', 'Boil pasta, add tomato and garlic'),
+        ])
+
+    def test_search_requires_every_token(self):
+        """ Test only documents containing all tokens match """
+        self.assertEqual(sorted(self.index.search('tomato garlic')), [1, 3])
+
+    def test_search_ranks_name_matches_first(self):
+        """ Test name matches come first and ties go newest first """
+        self.assertEqual(self.index.search('garlic'), [2, 3, 1])
+
+    def test_search_is_case_insensitive(self):
+        """ Test tokens are matched regardless of case """
+        self.assertEqual(self.index.search('PASTA'), [3])
+
+    def test_search_no_match(self):
+        """ Test unknown or empty queries return nothing """
+        self.assertEqual(self.index.search('chocolate'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+
+class RecipeSearchApiTests(TestCase):
+    """ Test searching recipes through the API """
+
+    def setUp(self):
+        index_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _names(self, params):
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['name'] for recipe in res.data]
+
+    def test_search_name_and_text(self):
+        """ Test search matches the name and the text, best first """
+        Recipe.objects.create(
+            user=self.user, name='Roast chicken', text='Roast it'
+        )
+        Recipe.objects.create(
+            user=self.user, name='Rice bowl', text='Top with chicken'
+        )
+        Recipe.objects.create(user=self.user, name='Salad', text='Toss')
+
+        names = self._names({'search': 'chicken'})
+
+        self.assertEqual(names, ['Roast chicken', 'Rice bowl'])
+
+    def test_search_limited_to_user(self):
+        """ Test other users' recipes are never found """
+        user2 = get_user_model().objects.create_user(
+            'other@kosta.com',
+            'test123'
+        )
+        Recipe.objects.create(user=user2, name='Chicken curry', text='Text')
+
+        self.assertEqual(self._names({'search': 'chicken'}), [])
+
+    def test_search_sees_new_recipes(self):
+        """ Test recipes created after a search are found by the next one """
+        self._names({'search': 'lasagne'})
+
+        Recipe.objects.create(user=self.user, name='Lasagne', text='Bake')
+
+        self.assertEqual(self._names({'search': 'lasagne'}), ['Lasagne'])
+
+    def test_search_combined_with_ingredients(self):
+        """ Test search composes with the ingredient filter """
+        ingredient = Ingredient.objects.create(user=self.user, name='Leek')
+        soup = Recipe.objects.create(
+            user=self.user, name='Leek soup', text='Text'
+        )
+        soup.ingredients.add(ingredient)
+        Recipe.objects.create(user=self.user, name='Tomato soup', text='T')
+
+        names = self._names(
+            {'search': 'soup', 'ingredients': str(ingredient.id)}
+        )
+
+        self.assertEqual(names, ['Leek soup'])
+
+    def test_search_paginated_by_offset(self):
+        """ Test ranked results keep their order across offset pages """
+        for name, text in (('Stew', 'Add beef'), ('Beef stew', 'Slow'),
+                           ('Pie', 'Bake the beef'), ('Beef pie', 'Bake')):
+            Recipe.objects.create(user=self.user, name=name, text=text)
+        ranked = self._names({'search': 'beef'})
+
+        names = []
+        for offset in range(0, len(ranked), 3):
+            res = self.client.get(RECIPES_URL, {
+                'search': 'beef', 'limit': 3, 'offset': offset
+            })
+            names += [recipe['name'] for recipe in res.data['results']]
+
+        self.assertEqual(ranked[:2], ['Beef pie', 'Beef stew'])
+        self.assertEqual(names, ranked)
+
+    def test_search_rejects_cursor(self):
+        """ Test cursor pagination, which would order by id, is refused """
+        res = self.client.get(RECIPES_URL, {'search': 'beef', 'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('search', res.data)
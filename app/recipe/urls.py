@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from recipe import views
+from recipe import async_views, views
 
 router = DefaultRouter()
 router.register('ingredients', views.IngredientViewSet)
@@ -12,4 +12,20 @@ app_name = 'recipe'
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Native async read endpoints for ASGI deployments
+    path(
+        'async/recipes/',
+        async_views.recipe_list,
+        name='async-recipe-list'
+    ),
+    path(
+        'async/recipes/<int:pk>/',
+        async_views.recipe_detail,
+        name='async-recipe-detail'
+    ),
+    path(
+        'async/ingredients/',
+        async_views.ingredient_list,
+        name='async-ingredient-list'
+    ),
 ]
@@ -1,21 +1,54 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 
 from core.models import Ingredient, Recipe
+from core.renderers import API_RENDERER_CLASSES
+
+from user.authentication import API_AUTHENTICATION_CLASSES
 
 from recipe import serializers
+from recipe.bulk import add_recipe_ingredients, remove_recipe_ingredients
+from recipe.cache import CachedListMixin, bump_generation
+from recipe.conditional import ConditionalListMixin, \
+    ConditionalRetrieveMixin
+from recipe.exporter import RecipeExporter
+from recipe.importer import RecipeImporter
+from recipe.matching import MATCH_ANY, MATCH_COVERAGE, MATCH_MODES, \
+    match_recipes
+from recipe.pagination import OptInPaginationMixin, \
+    IngredientCursorPagination, RecipeCursorPagination
+from recipe.fieldsets import SparseFieldsetMixin
+from recipe.rows import RowListMixin, attach_ingredient_ids, \
+    attach_ingredients
+from recipe.search import search_recipes
+from recipe.signals import touch_recipes
 
 
-class IngredientViewSet(viewsets.GenericViewSet,
+class IngredientViewSet(ConditionalListMixin,
+                        CachedListMixin,
+                        OptInPaginationMixin,
+                        RowListMixin,
+                        viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.CreateModelMixin):
     """Manage ingredients in the database"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = (IsAuthenticated,)
+    renderer_classes = API_RENDERER_CLASSES
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    row_serializer_classes = (serializers.IngredientSerializer,)
+    cursor_pagination_class = IngredientCursorPagination
+    cache_namespace = 'ingredients'
+    etag_namespace = 'ingredients'
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
@@ -28,36 +61,211 @@ class IngredientViewSet(viewsets.GenericViewSet,
         return queryset.filter(
             user=self.request.user).order_by('-name').distinct()
 
+    def create(self, request, *args, **kwargs):
+        """ Create one ingredient, or a batch when given a JSON array """
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        max_batch = settings.INGREDIENT_BULK_MAX_BATCH
+        if len(request.data) > max_batch:
+            raise ValidationError({'non_field_errors': [
+                'At most {} ingredients can be created at once.'.format(
+                    max_batch)
+            ]})
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_create(serializer)
+        # bulk_create does not send post_save, invalidate explicitly
+        bump_generation(request.user.pk)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer):
         """ Create a new ingredinet"""
         serializer.save(user=self.request.user)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    CachedListMixin,
+                    OptInPaginationMixin,
+                    SparseFieldsetMixin,
+                    RowListMixin,
+                    viewsets.ModelViewSet):
     """ Manage recipes in the database"""
     serializer_class = serializers.RecipeSerializer
+    row_serializer_classes = (
+        serializers.RecipeSerializer, serializers.RecipeMatchSerializer
+    )
+    row_relations = {'ingredients': attach_ingredient_ids}
+    row_expansions = {'ingredients': attach_ingredients}
+    # updated_at builds the validators of conditional retrieves
+    fieldset_columns = ('id', 'updated_at')
+    cursor_pagination_class = RecipeCursorPagination
+    cache_namespace = 'recipes'
+    etag_namespace = 'recipes'
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = (IsAuthenticated, )
+    renderer_classes = API_RENDERER_CLASSES
 
     def _params_to_ints(self, qs):
         """ Convert a list of string IDs to a list of ints"""
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError({'ingredients': [
+                'Expected a comma separated list of ids.'
+            ]})
+
+    def _match_params(self):
+        """ Return the validated match mode and max_missing parameters """
+        params = self.request.query_params
+        mode = params.get('match', MATCH_ANY)
+        if mode not in MATCH_MODES:
+            raise ValidationError({'match': [
+                'Expected one of: {}.'.format(', '.join(MATCH_MODES))
+            ]})
+        max_missing = params.get('max_missing')
+        if max_missing is not None:
+            try:
+                max_missing = int(max_missing)
+            except ValueError:
+                max_missing = -1
+            if max_missing < 0:
+                raise ValidationError({'max_missing': [
+                    'Expected a non-negative integer.'
+                ]})
+        return mode, max_missing
 
     def get_queryset(self):
         """ Retrieve the recipes for the authenticated user """
         ingredients = self.request.query_params.get('ingredients')
         queryset = self.queryset
+        queryset = queryset.filter(user=self.request.user).order_by('-id')
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-        return queryset.filter(user=self.request.user)
+            mode, max_missing = self._match_params()
+            queryset = match_recipes(
+                queryset, ingredient_ids, mode, max_missing
+            )
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = search_recipes(queryset, search, self.request.user)
+        return self._prefetch_for_action(self.select_fieldset(queryset))
+
+    def get_ranking_param(self):
+        """ Searches and coverage matches are ranked, not ordered by id """
+        params = self.request.query_params
+        if params.get('search'):
+            return 'search'
+        if params.get('ingredients') and \
+                params.get('match', MATCH_ANY) == MATCH_COVERAGE:
+            return 'match'
+        return None
+
+    def _prefetch_for_action(self, queryset):
+        """
+            Prefetch the relations the current action serializes so that
+            list and retrieve run a constant number of queries no matter
+            how many recipes are returned. Ingredients left out by ?fields=
+            are not fetched at all.
+        """
+        if self.action in ('list', 'retrieve') and \
+                self.is_field_selected('ingredients'):
+            return queryset.prefetch_related('ingredients')
+        return queryset
 
     def get_serializer_class(self):
         """ Return appropriate serializer class """
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
+        if self.action == 'list' and \
+                self.request.query_params.get('ingredients') and \
+                self.request.query_params.get('match', MATCH_ANY) != MATCH_ANY:
+            return serializers.RecipeMatchSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         """ Create a new recipe"""
         serializer.save(user=self.request.user)
+
+    def _change_ingredients(self, request, change):
+        """
+            Apply change(recipe, ingredient ids) to the requested recipe
+            and return its new representation
+        """
+        recipe = self.get_object()
+        serializer = serializers.RecipeIngredientsSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        ingredient_ids = [
+            ingredient.pk
+            for ingredient in serializer.validated_data['ingredients']
+        ]
+        with transaction.atomic():
+            change(recipe, ingredient_ids)
+            # The links change without m2m_changed, do what it would
+            touch_recipes(Recipe.objects.filter(pk=recipe.pk))
+            bump_generation(recipe.user_id)
+        return Response(self.get_serializer(recipe).data)
+
+    @action(detail=True, methods=['post'], url_path='add-ingredients')
+    def add_ingredients(self, request, pk=None):
+        """ Add ingredients to a recipe, keeping the ones it has """
+        return self._change_ingredients(request, add_recipe_ingredients)
+
+    @action(detail=True, methods=['post'], url_path='remove-ingredients')
+    def remove_ingredients(self, request, pk=None):
+        """ Remove ingredients from a recipe, ignoring the ones it lacks """
+        return self._change_ingredients(request, remove_recipe_ingredients)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_recipes(self, request):
+        """
+            Import recipes from a newline-delimited JSON body.
+            The body is read line by line straight from the request stream
+            and written in batches of IMPORT_BATCH_SIZE recipes.
+        """
+        stream = request.stream
+        if stream is None:
+            raise ValidationError({'non_field_errors': ['Empty body.']})
+        importer = RecipeImporter(
+            request.user, batch_size=settings.IMPORT_BATCH_SIZE
+        )
+        return Response(
+            importer.import_lines(stream), status=status.HTTP_201_CREATED
+        )
+
+    def perform_content_negotiation(self, request, force=False):
+        """
+            The export streams the format asked with ?type whatever the
+            client accepts, its errors fall back to the first renderer
+        """
+        return super().perform_content_negotiation(
+            request, force=force or self.action == 'export'
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+            Stream every recipe of the user with its ingredients.
+            ?type=jsonl (default) returns JSON Lines, ?type=csv returns CSV.
+        """
+        export_format = request.query_params.get('type', 'jsonl')
+        if export_format not in RecipeExporter.formats:
+            raise ValidationError({'type': [
+                'Expected one of: {}.'.format(
+                    ', '.join(sorted(RecipeExporter.formats)))
+            ]})
+        exporter = RecipeExporter(
+            request.user, chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            exporter.stream(export_format),
+            content_type=RecipeExporter.formats[export_format]
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="recipes.{}"'.format(export_format)
+        return response
@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class UserConfig(AppConfig):
     name = 'user'
+
+    def ready(self):
+        """
+            Connect the token cache invalidation signal handlers and check
+            the signed tokens can be revoked
+        """
+        from user import signals  # noqa: F401
+        from user.tokens import check_revocation_cache
+
+        check_revocation_cache()
@@ -0,0 +1,155 @@
+"""
+    Async versions of the create user and token endpoints.
+
+    Database work runs through sync_to_async and password hashing on the
+    bounded hashing pool, so under ASGI a login storm queues on the pool
+    instead of holding every worker.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from user.hashing import PoolOverloaded, hashing_pool
+from user.serializers import CredentialsSerializer, UserSerializer
+
+
+def csrf_exempt(view):
+    """ csrf_exempt for async views, the Django 3.1 one wraps them """
+    view.csrf_exempt = True
+    return view
+
+
+def _db(func):
+    """ Run func on the thread that owns the database connection """
+    return sync_to_async(func, thread_sensitive=True)
+
+
+def _parse(request):
+    """ Return the request body as a dict """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST.dict()
+
+
+def _overloaded():
+    response = JsonResponse(
+        {'detail': _('Too many logins, try again shortly.')},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def _validate(serializer):
+    serializer.is_valid()
+    return serializer.errors
+
+
+def _get_user(email):
+    return get_user_model().objects.filter(email=email).first()
+
+
+def _save_password(user, encoded):
+    user.password = encoded
+    user.save(update_fields=['password'])
+
+
+def _create_user(validated_data, encoded):
+    data = dict(validated_data)
+    del data['password']
+    user_model = get_user_model()
+    user = user_model(
+        email=user_model.objects.normalize_email(data.pop('email')), **data
+    )
+    user.password = encoded
+    user.save()
+    return UserSerializer(user).data
+
+
+def _get_token(user):
+    return Token.objects.get_or_create(user=user)[0].key
+
+
+@csrf_exempt
+async def create_user(request):
+    """ Create a new user, hashing the password on the pool """
+    if request.method != 'POST':
+        return JsonResponse({}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    data = _parse(request)
+    if data is None:
+        return JsonResponse(
+            {'detail': _('Malformed JSON.')},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = UserSerializer(data=data)
+    errors = await _db(_validate)(serializer)
+    if errors:
+        return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        encoded = await hashing_pool.make_password(
+            serializer.validated_data['password']
+        )
+    except PoolOverloaded:
+        return _overloaded()
+    user_data = await _db(_create_user)(
+        serializer.validated_data, encoded
+    )
+    return JsonResponse(user_data, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+async def create_token(request):
+    """ Create an auth token, checking the password on the pool """
+    if request.method != 'POST':
+        return JsonResponse({}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    data = _parse(request)
+    if data is None:
+        return JsonResponse(
+            {'detail': _('Malformed JSON.')},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = CredentialsSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(
+            serializer.errors, status=status.HTTP_400_BAD_REQUEST
+        )
+    email = serializer.validated_data['email']
+    password = serializer.validated_data['password']
+
+    user = await _db(_get_user)(email)
+    try:
+        if user is None:
+            # Hash anyway so unknown emails take as long as known ones
+            await hashing_pool.make_password(password)
+            valid, rehashed = False, None
+        else:
+            valid, rehashed = await hashing_pool.check_password(
+                password, user.password
+            )
+    except PoolOverloaded:
+        return _overloaded()
+
+    if not valid or not user.is_active:
+        return JsonResponse(
+            {'non_field_errors': [
+                _('Unable to authenticat with provided credentials')
+            ]},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if rehashed:
+        await _db(_save_password)(user, rehashed)
+    token = await _db(_get_token)(user)
+    return JsonResponse({'token': token})
@@ -0,0 +1,215 @@
+"""
+    Token authentication with an in-process cache of token -> user.
+
+    DRF's TokenAuthentication joins the authtoken and user tables on every
+    request. CachedTokenAuthentication keeps recent lookups in a bounded
+    LRU with a TTL. Entries are dropped in this process when the token is
+    deleted or the user is saved or deleted (deactivation, password
+    change); other processes catch up when the TTL expires.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, \
+    TokenAuthentication, get_authorization_header
+
+from user.tokens import TokenError, verify_access_token
+
+
+class TokenCache:
+    """ Thread-safe LRU of token key -> (user, token) with a TTL """
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._user_keys = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """ Return the cached (user, token) for key or None """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, user, token):
+        """ Cache the user and token for key """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, user, token)
+            self._user_keys[user.pk].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """ Drop the entry of a token """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        """ Drop every entry of a user """
+        with self._lock:
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        """ Drop every entry and reset the counters """
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.hits = self.misses = 0
+            self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """ Return the cache counters """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        """ Remove an entry, the lock must be held """
+        _, user, _ = self._entries.pop(key)
+        keys = self._user_keys[user.pk]
+        keys.discard(key)
+        if not keys:
+            del self._user_keys[user.pk]
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """ TokenAuthentication that skips the database for cached tokens """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        """ Return (user, token) from the cache or the database """
+        cached = self.get_cached_credentials(key)
+        if cached is not None:
+            return cached
+        return self.load_credentials(key)
+
+    def get_cached_credentials(self, key):
+        """ Return (user, token) if the token is cached, else None """
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        user, token = cached
+        # Each request gets its own copy, views may modify the user
+        return copy.copy(user), token
+
+    def load_credentials(self, key):
+        """ Look the token up in the database and cache it """
+        user, token = super().authenticate_credentials(key)
+        self.cache.set(key, user, token)
+        return copy.copy(user), token
+
+    async def authenticate_async(self, request):
+        """ authenticate() for async views, only misses leave the loop """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        cached = self.get_cached_credentials(key)
+        if cached is not None:
+            return cached
+        return await sync_to_async(
+            self.load_credentials, thread_sensitive=True
+        )(key)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+        Authenticate signed access tokens without touching the database.
+        The user is returned with every field but the id deferred, so it
+        is only loaded if a view reads it.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        if not settings.SIGNED_TOKENS_ENABLED:
+            return None
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                'Invalid bearer header.')
+
+        try:
+            payload = verify_access_token(auth[1].decode())
+        except (TokenError, UnicodeError) as error:
+            raise exceptions.AuthenticationFailed(str(error))
+
+        user_model = get_user_model()
+        user = user_model.from_db(
+            router.db_for_read(user_model), ['id'], [payload['uid']]
+        )
+        return user, payload
+
+    async def authenticate_async(self, request):
+        """ authenticate() for async views, it never touches the database """
+        return self.authenticate(request)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+# Authentication used by the API views, signed tokens are only accepted
+# when SIGNED_TOKENS_ENABLED is set
+API_AUTHENTICATION_CLASSES = (
+    CachedTokenAuthentication,
+    SignedTokenAuthentication,
+)
+
+
+async def authenticate_async(request):
+    """
+        Authenticate a plain Django request with API_AUTHENTICATION_CLASSES
+        from an async view. Return (user, auth) or None.
+    """
+    for authentication_class in API_AUTHENTICATION_CLASSES:
+        result = await authentication_class().authenticate_async(request)
+        if result is not None:
+            return result
+    return None
@@ -0,0 +1,80 @@
+"""
+    Bounded thread pool for password hashing.
+
+    PBKDF2 releases the GIL while it runs, so hashing on a pool keeps the
+    event loop of the async user views free. The number of hashes waiting
+    for a thread is capped: past PASSWORD_HASH_MAX_PENDING new ones are
+    refused instead of piling up behind a login storm.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, \
+    identify_hasher, make_password
+
+
+class PoolOverloaded(Exception):
+    """ Raised when too many hashes are already waiting """
+
+
+class HashingPool:
+    """ Thread pool refusing work once max_pending hashes are queued """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hash'
+                )
+            return self._executor
+
+    async def run(self, func, *args):
+        """ Run func on the pool or raise PoolOverloaded when it is full """
+        if not self._slots.acquire(blocking=False):
+            raise PoolOverloaded()
+        try:
+            return await asyncio.get_event_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self._slots.release()
+
+    async def make_password(self, password):
+        """ Hash a password on the pool """
+        return await self.run(make_password, password)
+
+    async def check_password(self, password, encoded):
+        """
+            Check a password on the pool. Return whether it matched and, if
+            the hash uses outdated parameters, the password hashed again.
+        """
+        if not await self.run(check_password, password, encoded):
+            return False, None
+        preferred = get_hasher()
+        if identify_hasher(encoded).algorithm != preferred.algorithm or \
+                preferred.must_update(encoded):
+            return True, await self.make_password(password)
+        return True, None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -38,14 +38,18 @@ class UserSerializer(serializers.ModelSerializer):
 
         return user
 
-class AuthTokenSerializer(serializers.Serializer):
-    """ Serializer for the user authentication object """
+class CredentialsSerializer(serializers.Serializer):
+    """ Serializer for an email and password, not checked against a user """
     email = serializers.CharField()
     password = serializers.CharField(
-        style = {'input_type': 'password'},
+        style={'input_type': 'password'},
         trim_whitespace=False
     )
 
+
+class AuthTokenSerializer(CredentialsSerializer):
+    """ Serializer for the user authentication object """
+
     #validate function - checking that everything is correct
     def validate(self, attrs):
         """ Validate and authenticate the user """
@@ -62,3 +66,8 @@ class AuthTokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(msg, code='authentication')
         attrs['user'] = user
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """ Serializer for a refresh token """
+    refresh = serializers.CharField(trim_whitespace=False)
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+from user.tokens import revoke_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """ Forget a deleted token """
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """
+        Forget the tokens of a saved or deleted user, which covers
+        deactivation and password changes
+    """
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_signed_tokens(sender, instance, created, **kwargs):
+    """ Revoke the signed tokens of a deactivated user or new password """
+    # set_password() keeps the raw password until the user is saved
+    password_changed = getattr(instance, '_password', None) is not None
+    if not created and (password_changed or not instance.is_active):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    """ Reject the access tokens of a deleted user """
+    revoke_user_tokens(instance.pk)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.hashing import HashingPool, PoolOverloaded
+
+
+CREATE_ASYNC_URL = reverse('user:create-async')
+TOKEN_ASYNC_URL = reverse('user:token-async')
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class AsyncUserApiTests(TestCase):
+    """ Test the async create user and token endpoints """
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _post(self, url, payload):
+        return self.client.post(url, payload, format='json')
+
+    def test_create_user(self):
+        """ Test a user is created with a usable password """
+        res = self._post(CREATE_ASYNC_URL, {
+            'email': 'test@kosta.com',
+            'password': 'test123',
+            'first_name': 'Test'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = get_user_model().objects.get(email='test@kosta.com')
+        self.assertTrue(user.check_password('test123'))
+        self.assertNotIn('password', res.json())
+
+    def test_create_user_invalid(self):
+        """ Test the user serializer validation applies """
+        res = self._post(CREATE_ASYNC_URL, {
+            'email': 'test@kosta.com', 'password': 'pw'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', res.json())
+
+    def test_create_token(self):
+        """ Test a token is returned for valid credentials """
+        get_user_model().objects.create_user('test@kosta.com', 'test123')
+
+        res = self._post(TOKEN_ASYNC_URL, {
+            'email': 'test@kosta.com', 'password': 'test123'
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.json())
+
+    def test_create_token_invalid_credentials(self):
+        """ Test no token is returned for a wrong password or user """
+        get_user_model().objects.create_user('test@kosta.com', 'test123')
+
+        wrong = self._post(TOKEN_ASYNC_URL, {
+            'email': 'test@kosta.com', 'password': 'wrong'
+        })
+        unknown = self._post(TOKEN_ASYNC_URL, {
+            'email': 'other@kosta.com', 'password': 'test123'
+        })
+
+        self.assertEqual(wrong.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(unknown.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_token_rehashes_outdated_password(self):
+        """ Test logging in upgrades a hash made with another cost """
+        user = get_user_model().objects.create_user('test@kosta.com', 'pw')
+        with override_settings(PASSWORD_HASH_ITERATIONS=500):
+            user.password = make_password('test123')
+        user.save()
+
+        self._post(TOKEN_ASYNC_URL, {
+            'email': 'test@kosta.com', 'password': 'test123'
+        })
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_create_token_overloaded(self):
+        """ Test logins are refused while the pool is full """
+        get_user_model().objects.create_user('test@kosta.com', 'test123')
+
+        with patch('user.async_views.hashing_pool.check_password',
+                   side_effect=PoolOverloaded):
+            res = self._post(TOKEN_ASYNC_URL, {
+                'email': 'test@kosta.com', 'password': 'test123'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_sync_login_rehashes_outdated_password(self):
+        """ Test the regular login path upgrades outdated hashes too """
+        user = get_user_model().objects.create_user('test@kosta.com', 'pw')
+        with override_settings(PASSWORD_HASH_ITERATIONS=500):
+            user.set_password('test123')
+        user.save()
+
+        authenticate(username='test@kosta.com', password='test123')
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+
+class HashingPoolTests(TestCase):
+    """ Test the bounded hashing pool """
+
+    def test_refuses_work_when_full(self):
+        """ Test hashes beyond workers + max_pending are refused """
+        pool = HashingPool(workers=1, max_pending=0)
+        pool._slots.acquire()
+
+        with self.assertRaises(PoolOverloaded):
+            asyncio.new_event_loop().run_until_complete(
+                pool.make_password('test123')
+            )
+
+        pool._slots.release()
+        pool.shutdown()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class BenchHashingCommandTests(TestCase):
+    """ Test the password hashing benchmark command """
+
+    def test_reports_logins_per_core(self):
+        """ Test a result is printed for every iteration count """
+        out = StringIO()
+
+        call_command(
+            'bench_hashing', iterations=[1000, 2000], logins=4, workers=2,
+            json=True, stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual([r['iterations'] for r in results], [1000, 2000])
+        self.assertGreater(results[0]['logins_per_sec_per_core'], 0)
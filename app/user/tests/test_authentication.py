@@ -0,0 +1,123 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """ Test authenticating with cached tokens """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def _get_me(self):
+        return self.client.get(ME_URL)
+
+    def test_cached_request_skips_token_lookup(self):
+        """ Test a repeated request does not query the token table """
+        res = self._get_me()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self._get_me()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_deleted_token_rejected(self):
+        """ Test a deleted token stops authenticating at once """
+        self._get_me()
+
+        self.token.delete()
+
+        self.assertEqual(
+            self._get_me().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_deactivated_user_rejected(self):
+        """ Test deactivating a user invalidates their cached tokens """
+        self._get_me()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(
+            self._get_me().status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_password_change_invalidates(self):
+        """ Test changing the password drops the cached entry """
+        self._get_me()
+
+        self.client.patch(ME_URL, {'password': 'newpassword123'})
+
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+
+class TokenCacheTests(TestCase):
+    """ Test the token cache itself """
+
+    def setUp(self):
+        self.users = [
+            get_user_model().objects.create_user(
+                'user{}@kosta.com'.format(i), 'test123'
+            )
+            for i in range(3)
+        ]
+
+    def test_least_recently_used_evicted(self):
+        """ Test the oldest unused entry goes when the cache is full """
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', self.users[0], None)
+        cache.set('b', self.users[1], None)
+        cache.get('a')
+
+        cache.set('c', self.users[2], None)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        """ Test entries are dropped after the TTL """
+        cache = TokenCache(max_size=10, ttl=60)
+        with patch('user.authentication.time.monotonic', return_value=100):
+            cache.set('a', self.users[0], None)
+        with patch('user.authentication.time.monotonic', return_value=161):
+            self.assertIsNone(cache.get('a'))
+
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_invalidate_user(self):
+        """ Test every token of a user is dropped together """
+        cache = TokenCache()
+        cache.set('a', self.users[0], None)
+        cache.set('b', self.users[0], None)
+        cache.set('c', self.users[1], None)
+
+        cache.invalidate_user(self.users[0].pk)
+
+        self.assertEqual(cache.stats()['size'], 1)
+        self.assertIsNotNone(cache.get('c'))
@@ -0,0 +1,205 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RefreshToken
+
+from user.tokens import check_revocation_cache
+
+
+SIGNED_TOKEN_URL = reverse('user:signed-token')
+REFRESH_URL = reverse('user:refresh-token')
+REVOKE_URL = reverse('user:revoke-token')
+ME_URL = reverse('user:me')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(SIGNED_TOKENS_ENABLED=True, API_CACHE_ALIAS=None)
+class SignedTokenApiTests(TestCase):
+    """ Test the signed access and refresh tokens """
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@kosta.com',
+            'test123'
+        )
+        self.client = APIClient()
+
+    def _obtain(self):
+        res = self.client.post(
+            SIGNED_TOKEN_URL,
+            {'email': 'test@kosta.com', 'password': 'test123'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data
+
+    def _bearer(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+
+    def test_obtain_token_pair(self):
+        """ Test credentials are exchanged for both tokens """
+        pair = self._obtain()
+
+        self.assertIn('access', pair)
+        self.assertIn('refresh', pair)
+        self.assertEqual(RefreshToken.objects.count(), 1)
+
+    def test_invalid_credentials(self):
+        """ Test no token is issued for a wrong password """
+        res = self.client.post(
+            SIGNED_TOKEN_URL,
+            {'email': 'test@kosta.com', 'password': 'wrong'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_access_token_needs_no_query(self):
+        """ Test authenticating an access token does not hit the db """
+        self._bearer(self._obtain()['access'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Only the recipe list query itself
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_me_loads_deferred_user(self):
+        """ Test the profile is loaded for a signed token user """
+        self._bearer(self._obtain()['access'])
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'test@kosta.com')
+
+    def test_tampered_token_rejected(self):
+        """ Test a modified access token is rejected """
+        self._bearer(self._obtain()['access'] + 'x')
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token_rejected(self):
+        """ Test an access token is rejected after its lifetime """
+        pair = self._obtain()
+        self._bearer(pair['access'])
+
+        with patch('django.core.signing.time.time', return_value=1e11):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rotates_tokens(self):
+        """ Test a refresh token is exchanged once for a new pair """
+        pair = self._obtain()
+
+        res = self.client.post(REFRESH_URL, {'refresh': pair['refresh']})
+        again = self.client.post(REFRESH_URL, {'refresh': pair['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(res.data['refresh'], pair['refresh'])
+        self.assertEqual(again.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_concurrent_refresh_rotates_once(self):
+        """ Test a refresh token read by two requests is rotated once """
+        pair = self._obtain()
+        stale = RefreshToken.objects.select_related('user').get()
+        self.client.post(REFRESH_URL, {'refresh': pair['refresh']})
+
+        with patch('user.tokens._get_refresh_token', return_value=stale):
+            res = self.client.post(REFRESH_URL, {'refresh': pair['refresh']})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(RefreshToken.objects.count(), 2)
+
+    def test_revoke_rejects_access_token(self):
+        """ Test revoking a refresh token rejects its access tokens """
+        pair = self._obtain()
+
+        res = self.client.post(REVOKE_URL, {'refresh': pair['refresh']})
+        self._bearer(pair['access'])
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.client.get(RECIPES_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_password_change_revokes_tokens(self):
+        """ Test changing the password rejects the old tokens """
+        pair = self._obtain()
+
+        self.user.set_password('newpassword123')
+        self.user.save()
+        self._bearer(pair['access'])
+
+        self.assertEqual(
+            self.client.get(RECIPES_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+        res = self.client.post(REFRESH_URL, {'refresh': pair['refresh']})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """ Test deactivating a user rejects their access tokens """
+        pair = self._obtain()
+
+        self.user.is_active = False
+        self.user.save()
+        self._bearer(pair['access'])
+
+        self.assertEqual(
+            self.client.get(RECIPES_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    @override_settings(SIGNED_TOKENS_ENABLED=False)
+    def test_disabled(self):
+        """ Test signed tokens are refused unless enabled """
+        res = self.client.post(
+            SIGNED_TOKEN_URL,
+            {'email': 'test@kosta.com', 'password': 'test123'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RevocationCacheCheckTests(TestCase):
+    """ Test signed tokens refuse a revocation cache local to a process """
+    caches = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/revocations',
+        },
+    }
+
+    def test_local_memory_refused(self):
+        """ Test a local memory revocation cache fails the check """
+        with override_settings(SIGNED_TOKENS_ENABLED=True, CACHES=self.caches,
+                               TOKEN_REVOCATION_CACHE='default'):
+            with self.assertRaises(ImproperlyConfigured):
+                check_revocation_cache()
+
+    def test_shared_or_disabled_accepted(self):
+        """ Test a shared cache, or disabled signed tokens, pass the check """
+        with override_settings(SIGNED_TOKENS_ENABLED=True, CACHES=self.caches,
+                               TOKEN_REVOCATION_CACHE='shared'):
+            check_revocation_cache()
+        with override_settings(SIGNED_TOKENS_ENABLED=False,
+                               TOKEN_REVOCATION_CACHE='default'):
+            check_revocation_cache()
@@ -0,0 +1,157 @@
+"""
+    Signed access tokens and database backed refresh tokens.
+
+    An access token is a signed payload of the user id, the refresh token
+    it was issued from and the time it was issued. It is verified with an
+    HMAC and an expiry check only. Revoking a refresh token, deactivating
+    a user or changing their password writes a marker to the revocation
+    cache, which rejects the access tokens issued before it until they
+    expire on their own.
+"""
+import hashlib
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from core.models import RefreshToken
+
+
+ACCESS_TOKEN_SALT = 'user.tokens.access'
+
+
+class TokenError(Exception):
+    """ Raised for invalid, expired or revoked tokens """
+
+
+def _revocation_cache():
+    return caches[settings.TOKEN_REVOCATION_CACHE]
+
+
+def check_revocation_cache():
+    """
+        Raise ImproperlyConfigured when signed tokens are enabled with a
+        revocation cache local to the process, where a revocation would
+        only be seen by the process that wrote it
+    """
+    if not getattr(settings, 'SIGNED_TOKENS_ENABLED', False):
+        return
+    alias = settings.TOKEN_REVOCATION_CACHE
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend.endswith('.LocMemCache'):
+        raise ImproperlyConfigured(
+            'SIGNED_TOKENS_ENABLED needs a TOKEN_REVOCATION_CACHE shared by '
+            'every process, the {!r} cache is local memory.'.format(alias)
+        )
+
+
+def _revoked_refresh_key(refresh_id):
+    return 'revoked:refresh:{}'.format(refresh_id)
+
+
+def _revoked_user_key(user_id):
+    return 'revoked:user:{}'.format(user_id)
+
+
+def _hash(secret):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def issue_access_token(user_id, refresh_id):
+    """ Return a signed access token for a user """
+    return signing.dumps(
+        {'uid': user_id, 'rid': refresh_id, 'iat': time.time()},
+        salt=ACCESS_TOKEN_SALT
+    )
+
+
+def verify_access_token(token):
+    """ Return the payload of a valid access token or raise TokenError """
+    try:
+        payload = signing.loads(
+            token,
+            salt=ACCESS_TOKEN_SALT,
+            max_age=settings.ACCESS_TOKEN_LIFETIME
+        )
+    except signing.SignatureExpired:
+        raise TokenError('Access token expired.')
+    except signing.BadSignature:
+        raise TokenError('Invalid access token.')
+
+    refresh_key = _revoked_refresh_key(payload['rid'])
+    user_key = _revoked_user_key(payload['uid'])
+    revoked = _revocation_cache().get_many([refresh_key, user_key])
+    if refresh_key in revoked or revoked.get(user_key, 0) >= payload['iat']:
+        raise TokenError('Access token revoked.')
+    return payload
+
+
+def issue_token_pair(user):
+    """ Create a refresh token for a user and return both tokens """
+    secret = secrets.token_urlsafe(32)
+    refresh = RefreshToken.objects.create(
+        user=user,
+        key_hash=_hash(secret),
+        expires_at=timezone.now() + timedelta(
+            seconds=settings.REFRESH_TOKEN_LIFETIME
+        )
+    )
+    return {
+        'access': issue_access_token(user.pk, refresh.pk),
+        'refresh': secret,
+        'expires_in': settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def _get_refresh_token(secret):
+    """ Return the live refresh token for a secret or raise TokenError """
+    refresh = RefreshToken.objects.select_related('user').filter(
+        key_hash=_hash(secret or '')
+    ).first()
+    if refresh is None or refresh.revoked_at is not None:
+        raise TokenError('Invalid refresh token.')
+    if refresh.expires_at <= timezone.now() or not refresh.user.is_active:
+        raise TokenError('Refresh token expired.')
+    return refresh
+
+
+def rotate_refresh_token(secret):
+    """ Revoke a refresh token and return a new token pair in its place """
+    refresh = _get_refresh_token(secret)
+    revoke_refresh_token(refresh)
+    return issue_token_pair(refresh.user)
+
+
+def revoke_refresh_token(refresh):
+    """ Revoke a refresh token and the access tokens issued from it """
+    if isinstance(refresh, str):
+        refresh = _get_refresh_token(refresh)
+    # Only one of concurrent revocations of the same token may win, the
+    # others would otherwise each rotate it into a new token pair
+    revoked = RefreshToken.objects.filter(
+        pk=refresh.pk, revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+    if not revoked:
+        raise TokenError('Invalid refresh token.')
+    _revocation_cache().set(
+        _revoked_refresh_key(refresh.pk),
+        True,
+        settings.ACCESS_TOKEN_LIFETIME
+    )
+
+
+def revoke_user_tokens(user_id):
+    """ Revoke every refresh token of a user and their access tokens """
+    RefreshToken.objects.filter(
+        user_id=user_id, revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+    _revocation_cache().set(
+        _revoked_user_key(user_id),
+        time.time(),
+        settings.ACCESS_TOKEN_LIFETIME
+    )
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from user import views
+from user import async_views, views
 
 
 
@@ -10,5 +10,22 @@ urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('create/async/', async_views.create_user, name='create-async'),
+    path('token/async/', async_views.create_token, name='token-async'),
+    path(
+        'token/signed/',
+        views.CreateSignedTokenView.as_view(),
+        name='signed-token'
+    ),
+    path(
+        'token/refresh/',
+        views.RefreshSignedTokenView.as_view(),
+        name='refresh-token'
+    ),
+    path(
+        'token/revoke/',
+        views.RevokeSignedTokenView.as_view(),
+        name='revoke-token'
+    ),
 
 ]
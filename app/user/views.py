@@ -1,8 +1,17 @@
 
-from rest_framework import generics, authentication, permissions
+from django.conf import settings
+
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
-from user.serializers import UserSerializer, AuthTokenSerializer
+from rest_framework.views import APIView
+
+from user import tokens
+from user.authentication import API_AUTHENTICATION_CLASSES
+from user.serializers import UserSerializer, AuthTokenSerializer, \
+    RefreshTokenSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -23,9 +32,73 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """ Manae the authenticated user """
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = API_AUTHENTICATION_CLASSES
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """ Retreive and return authenticated user"""
-        return self.request.user
+        user = self.request.user
+        # Users authenticated by a signed token only have their id loaded
+        deferred = user.get_deferred_fields()
+        if deferred:
+            user.refresh_from_db(fields=deferred)
+        return user
+
+
+class SignedTokenViewMixin:
+    """ Views only available when signed tokens are enabled """
+    authentication_classes = ()
+    permission_classes = ()
+
+    def initial(self, request, *args, **kwargs):
+        if not settings.SIGNED_TOKENS_ENABLED:
+            raise NotFound()
+        super().initial(request, *args, **kwargs)
+
+    def get_authenticate_header(self, request):
+        """ Answer bad refresh tokens with a 401 """
+        return 'Bearer'
+
+
+class CreateSignedTokenView(SignedTokenViewMixin, APIView):
+    """ Exchange credentials for an access and a refresh token """
+    serializer_class = AuthTokenSerializer
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(
+            data=request.data, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            tokens.issue_token_pair(serializer.validated_data['user']),
+            status=status.HTTP_201_CREATED
+        )
+
+
+class RefreshSignedTokenView(SignedTokenViewMixin, APIView):
+    """ Exchange a refresh token for a new access and refresh token """
+
+    def post(self, request, *args, **kwargs):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            pair = tokens.rotate_refresh_token(
+                serializer.validated_data['refresh']
+            )
+        except tokens.TokenError as error:
+            raise AuthenticationFailed(str(error))
+        return Response(pair, status=status.HTTP_201_CREATED)
+
+
+class RevokeSignedTokenView(SignedTokenViewMixin, APIView):
+    """ Revoke a refresh token and the access tokens issued from it """
+
+    def post(self, request, *args, **kwargs):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tokens.revoke_refresh_token(serializer.validated_data['refresh'])
+        except tokens.TokenError as error:
+            raise AuthenticationFailed(str(error))
+        return Response(status=status.HTTP_204_NO_CONTENT)